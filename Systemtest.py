@@ -25,7 +25,7 @@ import textwrap
 import traceback
 from dataclasses import dataclass, asdict, field
 from pathlib import Path
-from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Set, Union
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Set, Union
 try:
     import torch
     import torch.nn as nn
@@ -43,8 +43,9 @@ from systemtest.execution import (
     make_watchdog_callable,
     make_watchdog_expr_callable,
     run_candidate_with_watchdog,
+    run_candidates_with_watchdog,
 )
-from systemtest.validators import validate_algo_program, validate_code, validate_program
+from systemtest.validators import FORBIDDEN_NAMES, allowed_type_set, validate_algo_program, validate_code, validate_program
 
 
 def trace_exec(message: str) -> None:
@@ -150,18 +151,27 @@ except ImportError as e:
 # RUST VIRTUAL MACHINE INTEGRATION (Performance Booster)
 # ==============================================================================
 try:
-    # Trick to prioritize the installed 'rs_machine' package over the local folder
+    # Prioritize the installed 'rs_machine' package over the local folder: locate
+    # it on sys.path minus the current dir first (no import side effects, no
+    # sys.path mutation), so a missing package fails fast
     import sys
     import os
-    _original_path = list(sys.path)
+    import importlib.machinery
+    import importlib.util
     _cwd = os.getcwd()
-    # Temporarily remove current dir to avoid finding the source folder
-    sys.path = [p for p in sys.path if p != _cwd and p != '']
-    
-    import rs_machine
+    _rs_spec = importlib.machinery.PathFinder.find_spec(
+        "rs_machine", [p for p in sys.path if p != _cwd and p != '']
+    )
+    if _rs_spec is None or _rs_spec.loader is None:
+        raise ImportError("rs_machine is not installed")
     
-    # Restore path immediately
-    sys.path = _original_path
+    rs_machine = importlib.util.module_from_spec(_rs_spec)
+    sys.modules["rs_machine"] = rs_machine
+    try:
+        _rs_spec.loader.exec_module(rs_machine)
+    except BaseException:
+        sys.modules.pop("rs_machine", None)
+        raise
     
     # Verify it's the right one
     if hasattr(rs_machine, "VirtualMachine"):
@@ -3833,8 +3843,7 @@ class BudgetLadderPolicy:
                 break
             tasks = problem_generator.generate_tasks(level.task_count)
             transfer_tasks = problem_generator.generate_tasks(level.transfer_count, parents=tasks)
-            for candidate in survivors:
-                evaluator.evaluate(candidate, tasks, transfer_tasks, archive, reward_model)
+            evaluator.evaluate_batch(survivors, tasks, transfer_tasks, archive, reward_model)
             survivors = sorted(survivors, key=lambda c: c.score, reverse=True)[: level.survivors]
         return survivors
 
@@ -3866,6 +3875,36 @@ class InventionEvaluator:
         for task in transfer_tasks:
             success, info = self._run_in_subprocess(candidate.code, task, timeout)
             transfer_results.append((success, info))
+        self._record(candidate, results, transfer_results, tasks, archive, reward_model)
+
+    def evaluate_batch(
+        self,
+        candidates: List[InventionProgramCandidate],
+        tasks: List[InventionTask],
+        transfer_tasks: List[InventionTask],
+        archive: "InventionArchive",
+        reward_model: "RewardModel",
+        timeout: float = 1.0,
+    ) -> None:
+        """evaluate() for candidates sharing tasks: one watchdog call per task runs
+        every candidate, then candidates are scored in order as evaluate() would."""
+        codes = [candidate.code for candidate in candidates]
+        per_task = [self._run_batch_in_subprocess(codes, task, timeout) for task in tasks]
+        per_transfer = [self._run_batch_in_subprocess(codes, task, timeout) for task in transfer_tasks]
+        for idx, candidate in enumerate(candidates):
+            results = [outcomes[idx] for outcomes in per_task]
+            transfer_results = [outcomes[idx] for outcomes in per_transfer]
+            self._record(candidate, results, transfer_results, tasks, archive, reward_model)
+
+    def _record(
+        self,
+        candidate: InventionProgramCandidate,
+        results: List[Tuple[bool, str]],
+        transfer_results: List[Tuple[bool, str]],
+        tasks: List[InventionTask],
+        archive: "InventionArchive",
+        reward_model: "RewardModel",
+    ) -> None:
         candidate.diagnostics["results"] = results
         candidate.diagnostics["transfer_results"] = transfer_results
         candidate.features = self._extract_features(candidate.code)
@@ -3918,6 +3957,15 @@ class InventionEvaluator:
             print(f"  [EVAL] SUCCESS: {task.kind}")
         return success, info
 
+    def _run_batch_in_subprocess(
+        self, codes: List[str], task: InventionTask, timeout: float
+    ) -> List[Tuple[bool, str]]:
+        outcomes = run_candidates_with_watchdog(codes, task, timeout)
+        for success, _ in outcomes:
+            if success:
+                print(f"  [EVAL] SUCCESS: {task.kind}")
+        return outcomes
+
 
     @staticmethod
     def _evaluate_runner(queue: mp.Queue, code: str, task: InventionTask) -> None:
@@ -4948,31 +4996,39 @@ class ExprValidator(ast.NodeVisitor):
         self.allowed_names = allowed_names
         self.ok = True
         self.err: Optional[str] = None
+        self._allowed_types = allowed_type_set(self.ALLOWED)
 
     def visit(self, node):
-        if not isinstance(node, self.ALLOWED):
-            self.ok, self.err = (False, f"Forbidden expr node: {type(node).__name__}")
-            return
-        if isinstance(node, ast.Name):
-            if node.id.startswith("__") or node.id in ("open", "eval", "exec", "compile", "__import__", "globals", "locals"):
-                self.ok, self.err = (False, f"Forbidden name: {node.id}")
-                return
-            if node.id not in self.allowed_names:
-                self.ok, self.err = (False, f"Unknown name: {node.id}")
-                return
-        if isinstance(node, ast.Attribute):
-            if node.attr.startswith("__"):
-                self.ok, self.err = (False, f"Forbidden attribute: {node.attr}")
-                return
-        if isinstance(node, ast.Call):
-            if not isinstance(node.func, (ast.Name, ast.Attribute)):
-                self.ok, self.err = (False, "Forbidden call form (non-Name/Attribute callee)")
-                return
-        if isinstance(node, ast.Subscript):
-            if isinstance(node.value, ast.Name) and node.value.id in SAFE_BUILTINS:
-                self.ok, self.err = (False, "Forbidden subscript on builtin")
+        # Iterative pre-order walk that stops at the first violation
+        allowed_types = self._allowed_types
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if type(node) not in allowed_types and not isinstance(node, self.ALLOWED):
+                self.ok, self.err = (False, f"Forbidden expr node: {type(node).__name__}")
                 return
-        super().generic_visit(node)
+            if isinstance(node, ast.Name):
+                if node.id[:2] == "__" or node.id in FORBIDDEN_NAMES:
+                    self.ok, self.err = (False, f"Forbidden name: {node.id}")
+                    return
+                if node.id not in self.allowed_names:
+                    self.ok, self.err = (False, f"Unknown name: {node.id}")
+                    return
+            elif isinstance(node, ast.Attribute):
+                if node.attr[:2] == "__":
+                    self.ok, self.err = (False, f"Forbidden attribute: {node.attr}")
+                    return
+            elif isinstance(node, ast.Call):
+                if not isinstance(node.func, (ast.Name, ast.Attribute)):
+                    self.ok, self.err = (False, "Forbidden call form (non-Name/Attribute callee)")
+                    return
+            elif isinstance(node, ast.Subscript):
+                if isinstance(node.value, ast.Name) and node.value.id in SAFE_BUILTINS:
+                    self.ok, self.err = (False, "Forbidden subscript on builtin")
+                    return
+            children = list(ast.iter_child_nodes(node))
+            children.reverse()
+            stack.extend(children)
 
 def validate_expr(expr: str, extra: Optional[Set[str]] = None) -> Tuple[bool, str]:
     """PHASE A: validate expression with safe names only."""
@@ -4995,11 +5051,24 @@ def legacy_evaluate_expr(expr: str, x: Any, extra_funcs: Optional[Dict[str, Call
     RuntimeGuard("legacy_evaluate_expr")
 
 
+def _iter_nodes(tree: ast.AST) -> Iterator[ast.AST]:
+    # ast.walk without the deque: order differs, the node set does not
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(ast.iter_child_nodes(node))
+
+
 def node_count(code: str) -> int:
     try:
-        return sum(1 for _ in ast.walk(ast.parse(code)))
+        tree = ast.parse(code)
     except Exception:
         return 999
+    count = 0
+    for _ in _iter_nodes(tree):
+        count += 1
+    return count
 
 def ast_depth(code: str) -> int:
     try:
@@ -5021,10 +5090,23 @@ def program_limits_ok(code: str, max_nodes: int = 200, max_depth: int = 20, max_
         tree = ast.parse(code)
     except Exception:
         return False
-    nodes = sum(1 for _ in ast.walk(tree))
-    depth = ast_depth(code)
-    locals_set = {n.id for n in ast.walk(tree) if isinstance(n, ast.Name)}
-    return nodes <= max_nodes and depth <= max_depth and len(locals_set) <= max_locals
+    # Single traversal that bails out as soon as any limit is exceeded
+    nodes = 0
+    locals_set = set()
+    stack = [(tree, 1)]
+    while stack:
+        node, depth = stack.pop()
+        node_type = type(node)
+        nodes += 1
+        if nodes > max_nodes or depth > max_depth:
+            return False
+        if node_type is ast.Name:
+            locals_set.add(node.id)
+            if len(locals_set) > max_locals:
+                return False
+        for child in ast.iter_child_nodes(node):
+            stack.append((child, depth + 1))
+    return True
 
 
 def algo_program_limits_ok(
@@ -5040,20 +5122,35 @@ def algo_program_limits_ok(
         tree = ast.parse(code)
     except Exception:
         return False
-    nodes = sum(1 for _ in ast.walk(tree))
-    depth = ast_depth(code)
-    funcs = sum(1 for n in ast.walk(tree) if isinstance(n, ast.FunctionDef))
-    locals_set = {n.id for n in ast.walk(tree) if isinstance(n, ast.Name)}
-    consts = sum(1 for n in ast.walk(tree) if isinstance(n, ast.Constant))
-    subs = sum(1 for n in ast.walk(tree) if isinstance(n, ast.Subscript))
-    return (
-        nodes <= max_nodes
-        and depth <= max_depth
-        and funcs <= max_funcs
-        and len(locals_set) <= max_locals
-        and consts <= max_consts
-        and subs <= max_subscripts
-    )
+    # Single traversal accumulating every counter, with early exit
+    nodes = funcs = consts = subs = 0
+    locals_set = set()
+    stack = [(tree, 1)]
+    while stack:
+        node, depth = stack.pop()
+        node_type = type(node)
+        nodes += 1
+        if nodes > max_nodes or depth > max_depth:
+            return False
+        if node_type is ast.Name:
+            locals_set.add(node.id)
+            if len(locals_set) > max_locals:
+                return False
+        elif node_type is ast.Constant:
+            consts += 1
+            if consts > max_consts:
+                return False
+        elif node_type is ast.Subscript:
+            subs += 1
+            if subs > max_subscripts:
+                return False
+        elif node_type is ast.FunctionDef:
+            funcs += 1
+            if funcs > max_funcs:
+                return False
+        for child in ast.iter_child_nodes(node):
+            stack.append((child, depth + 1))
+    return True
 
 
 def legacy_run(code: str, x: Any, timeout_steps: int = 1000, extra_env: Optional[Dict[str, Any]] = None) -> Any:
@@ -14487,8 +14584,8 @@ class BottomUpSynthesizer:
             # Apply multiplier
             weights.append(base_w * struct_mult)
             
-        chosen_op_name = random.choices(op_names, weights=weights, k=1)[0]
-        arity = next(fitness for name, fitness in ops_list if name == chosen_op_name)
+        # Draw the (name, arity) pair itself; same RNG draw as choosing from op_names
+        chosen_op_name, arity = random.choices(ops_list, weights=weights, k=1)[0]
         
         if chosen_op_name == 'Rec':
             arg = self._generate_random_expr(depth - 1, priors, ops_list, atoms)
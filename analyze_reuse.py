@@ -1,9 +1,66 @@
 import pickle
 import os
+from collections import deque
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+class _Automaton:
+    """Minimal pure-Python stand-in for ahocorasick.Automaton (add_word / make_automaton / iter)."""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._value = [None]
+        self._dict_link = [0]  # nearest proper suffix state that ends a word (0 = none)
+
+    def add_word(self, word, value):
+        state = 0
+        for ch in word:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._value.append(None)
+                self._dict_link.append(0)
+            state = nxt
+        self._value[state] = value
+
+    def make_automaton(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = fail if fail != nxt else 0
+                fail = self._fail[nxt]
+                self._dict_link[nxt] = fail if self._value[fail] is not None else self._dict_link[fail]
+                queue.append(nxt)
+
+    def iter(self, text):
+        state = 0
+        for end, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            hit = state if self._value[state] is not None else self._dict_link[state]
+            while hit:
+                yield end, self._value[hit]
+                hit = self._dict_link[hit]
 
 codes = []
-for f in sorted(os.listdir('checkpoints')):
-    with open(f'checkpoints/{f}', 'rb') as fp:
+with os.scandir('checkpoints') as it:
+    entries = sorted((e for e in it if e.is_file()), key=lambda e: e.name)
+for e in entries:
+    with open(e.path, 'rb', buffering=1024 * 1024) as fp:
         codes.append(pickle.load(fp))
 
 print('=== All synthesized codes ===')
@@ -12,15 +69,25 @@ for c in codes:
 
 # Check for reuse
 print('\n=== Reuse Analysis ===')
-all_code_parts = set()
 reuse_count = 0
-for c in codes:
-    code = c['code']
-    # Check if this code uses any previously seen pattern
-    for prev in all_code_parts:
-        if prev in code and prev != code:
-            print(f"REUSE DETECTED: '{prev}' reused in '{code}'")
-            reuse_count += 1
-    all_code_parts.add(code)
+# One automaton over the whole corpus, built once: every code is scanned in
+# linear time, and a match only counts as reuse if the pattern first appeared
+# in an earlier checkpoint. pyahocorasick (C) is used when installed.
+first_seen = {}
+automaton = ahocorasick.Automaton() if ahocorasick is not None else _Automaton()
+for idx, c in enumerate(codes):
+    if c['code'] and c['code'] not in first_seen:
+        first_seen[c['code']] = idx
+        automaton.add_word(c['code'], (idx, c['code']))
+if first_seen:
+    automaton.make_automaton()
+    for idx, c in enumerate(codes):
+        code = c['code']
+        reported = set()
+        for _, (prev_idx, prev) in automaton.iter(code):
+            if prev_idx < idx and prev != code and prev not in reported:
+                reported.add(prev)
+                print(f"REUSE DETECTED: '{prev}' reused in '{code}'")
+                reuse_count += 1
 
 print(f"\nTotal reuse instances: {reuse_count}")
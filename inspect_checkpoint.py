@@ -8,7 +8,7 @@ from typing import Any, Dict
 
 
 def load_checkpoint(path: Path) -> Dict[str, Any]:
-    with path.open("rb") as handle:
+    with path.open("rb", buffering=1024 * 1024) as handle:
         payload = pickle.load(handle)
     if not isinstance(payload, dict):
         return {"raw": payload}
@@ -14,10 +14,13 @@ import os
 import random
 import tempfile
 import time
-from dataclasses import dataclass, field, asdict
-from typing import Any, Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Set, Tuple
 
-from safe_interpreter import DSLExpr, DSLVar, DSLVal, DSLApp, SemanticHasher, UtilityScorer
+from safe_interpreter import (
+    DSLExpr, DSLVar, DSLVal, DSLApp, SemanticHasher, UtilityScorer,
+    mk_var, mk_val, mk_app,
+)
 
 
 @dataclass
@@ -93,15 +96,15 @@ class Primitive:
     def _deserialize_expr(d: Dict) -> DSLExpr:
         """Deserialize dict to DSLExpr."""
         if d['type'] == 'val':
-            return DSLVal(d['value'])
+            return mk_val(d['value'])
         elif d['type'] == 'var':
-            return DSLVar(d['name'])
+            return mk_var(d['name'])
         elif d['type'] == 'app':
-            return DSLApp(
+            return mk_app(
                 d['func'],
                 [Primitive._deserialize_expr(a) for a in d['args']]
             )
-        return DSLVal(None)
+        return mk_val(None)
 
 
 class LibraryManager:
@@ -2,9 +2,16 @@
 import json
 import os
 import tempfile
-from typing import Dict, Any, List, Tuple
-from collections import defaultdict
+from typing import Dict, Any, List, Mapping, Sequence, Tuple
+from collections import Counter, defaultdict
 import re
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Identifier tokens of string programs, for feature extraction.
+_IDENT_RE = re.compile(r'[a-zA-Z_]\w*')
 
 
 class FailureAnalyzer:
@@ -261,9 +268,23 @@ class MetaHeuristic:
         'learning_rate': 0.1
     }
     
-    def __init__(self, load_path="rsi_meta_weights.json", no_io=False):
+    def __init__(self, load_path="rsi_meta_weights.json", no_io=False, mode="learned", persist=True):
+        """
+        mode: "learned" uses the meta-learned op weights; "uniform" makes
+        get_op_weights() return 1.0 for every op (A/B control arm) without
+        patching the class.
+        persist: If False, weights are still loaded but updates stay in memory.
+        """
+        if mode not in ("learned", "uniform"):
+            raise ValueError(f"Unknown MetaHeuristic mode: {mode!r}")
         self.WEIGHTS_FILE = load_path
         self.no_io = no_io
+        self.persist = persist
+        self.mode = mode
+        if mode == "uniform":
+            # Bound once here, so calls skip the class lookup and the branch
+            self.get_op_weights = self._uniform_op_weights
+            self.get_op_weights_array = self._uniform_op_weights_array
         
         if self.no_io:
             self.weights = dict(self.DEFAULT_WEIGHTS)
@@ -294,6 +315,12 @@ class MetaHeuristic:
             if os.path.exists(temp_path):
                 os.remove(temp_path)
 
+    def save(self):
+        """Write weights to WEIGHTS_FILE, unless IO or persistence is disabled."""
+        if self.no_io or not self.persist:
+            return
+        self._save_weights()
+
     def _sanitize_weights(self, data: Dict[str, Any]) -> Dict[str, float]:
         """Ensure loaded weights are numeric and sane."""
         if not isinstance(data, dict):
@@ -327,22 +354,18 @@ class MetaHeuristic:
         return score
         
     def _extract_features(self, program: Any) -> Dict[str, int]:
-        features = defaultdict(int)
-        
+        # Counter.update tallies in C; 'size' is seeded first so it keeps its key order
         if isinstance(program, (list, tuple)):
-            features['size'] = len(program)
-            for item in program:
-                if isinstance(item, str):
-                    features[item] += 1
+            features = Counter(size=len(program))
+            features.update(item for item in program if isinstance(item, str))
             return dict(features)
             
         # [RSI] Handle String Programs (NeuroGeneticSynthesizer v2 AST-String)
         if isinstance(program, str):
             # Extract all identifiers
-            tokens = re.findall(r'[a-zA-Z_]\w*', program)
-            features['size'] = len(tokens)
-            for token in tokens:
-                features[token] += 1
+            tokens = _IDENT_RE.findall(program)
+            features = Counter(size=len(tokens))
+            features.update(tokens)
             return dict(features)
             
         features = {'size': 0, 'recursion': 0, 'op_plus': 0, 'op_minus': 0, 'op_mult': 0}
@@ -365,22 +388,48 @@ class MetaHeuristic:
         traverse(program)
         return features
 
-    def get_op_weights(self, op_names: List[str]) -> Dict[str, float]:
+    def get_op_weights(self, op_names: Sequence[str]) -> Dict[str, float]:
         """
         Return meta-learned weights for specific operators.
         Used for multiplicative merge with library weights.
         
         Returns dict mapping op_name -> weight (default 1.0 if unknown).
         """
-        result = {}
-        for op in op_names:
-            # Check if we have learned weight for this op
-            if op in self.weights:
-                result[op] = self.weights[op]
-            else:
-                # Default weight 1.0 (neutral)
-                result[op] = 1.0
-        return result
+        weights = self.weights
+        return {op: weights.get(op, 1.0) for op in op_names}
+
+    def _uniform_op_weights(self, op_names: Sequence[str]) -> Dict[str, float]:
+        return dict.fromkeys(op_names, 1.0)
+
+    def get_op_weights_array(self, ops: Sequence[str]) -> "np.ndarray":
+        """
+        Meta weights as a float64 array aligned index-for-index with `ops`
+        (default 1.0 if unknown), for vectorized merging. Requires numpy.
+        """
+        weights = self.weights
+        return np.fromiter((weights.get(op, 1.0) for op in ops), dtype=np.float64, count=len(ops))
+
+    def _uniform_op_weights_array(self, ops: Sequence[str]) -> "np.ndarray":
+        return np.ones(len(ops), dtype=np.float64)
+
+    def update_from_credits(self, op_credits: Mapping[str, float], retention: float = 0.85):
+        """
+        Adaptive operator credit assignment.
+
+        Each credited op keeps `retention` of its weight and receives the
+        rest as its share of the total credit, scaled by the credited ops'
+        combined weight so that mass is redistributed rather than shrunk:
+            w[op] = retention * w[op] + (1 - retention) * share[op] * mass
+        Ops without credit are left unchanged. Call save() to persist.
+        """
+        credits = {op: float(c) for op, c in op_credits.items() if c > 0}
+        total = sum(credits.values())
+        if total <= 0:
+            return
+        weights = self.weights
+        mass = sum(weights.get(op, 1.0) for op in credits)
+        for op, credit in credits.items():
+            weights[op] = retention * weights.get(op, 1.0) + (1.0 - retention) * (credit / total) * mass
 
     def learn(self, successful_program: Any):
         """
@@ -401,7 +450,7 @@ class MetaHeuristic:
         
         # Normalize to prevent explosion (optional, but good practice)
         # For simple version, we just save.
-        self._save_weights()
+        self.save()
         print(f"[RSI-Meta] 🧠 Updated Search Heuristics: {self.weights}")
 
     def learn_failure(self, failed_program: Any, failure_type: str = "LOW_SCORE_VALID", context: Dict = None):
@@ -451,7 +500,7 @@ class MetaHeuristic:
                 self.failed_ops[op][failure_type] += 1
         
         # Save updated weights to disk (Critical for Treatment group learning)
-        self._save_weights()
+        self.save()
 
 
 
@@ -5,13 +5,15 @@ Combines Evolutionary Search with Neural Guidance in a Sandboxed Environment.
 import ast
 import random
 import time
-import math
 import json
 import collections
+import functools
+import itertools
 import hashlib
 import os
-from dataclasses import dataclass, field, asdict
-from typing import List, Dict, Any, Tuple, Optional, Callable, Set, Union
+import re
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Tuple, Optional, Callable, Union
 try:
     import numpy as np
 except ImportError:
@@ -33,6 +35,13 @@ REGISTRY_FILE = "rsi_primitive_registry.json"
 # ==============================================================================
 # I. SAFE INTERPRETER (Sandboxed AST Execution)
 # ==============================================================================
+@functools.lru_cache(maxsize=8192)
+def _parse_expr(code: str) -> ast.expr:
+    """Parse an expression once; run() is called per IO pair with the same string.
+    The returned tree is shared - callers must not mutate it."""
+    return ast.parse(code, mode='eval').body
+
+
 class SafeInterpreter(ast.NodeVisitor):
     """
     Executes Python AST nodes in a strict sandbox.
@@ -49,7 +58,7 @@ class SafeInterpreter(ast.NodeVisitor):
         
         if isinstance(node, str):
             try:
-                node = ast.parse(node, mode='eval').body
+                node = _parse_expr(node)
             except SyntaxError as e:
                 # [DIAGNOSTIC] Return syntax error details
                 return {"__error__": "SyntaxError", "msg": str(e)}
@@ -274,6 +283,41 @@ class SemanticHasher(ast.NodeVisitor):
 # ==============================================================================
 # III. LIBRARY MANAGER (RSI Registry & DAG)
 # ==============================================================================
+def _balanced_args(depth: int) -> str:
+    """Regex for call arguments with up to `depth` levels of nested parentheses."""
+    pattern = r'[^()]*'
+    for _ in range(depth):
+        pattern = r'(?:[^()]|\(' + pattern + r'\))*'
+    return pattern
+
+
+# Tautologies collapsed by _is_bloated: double wrappers and identity arithmetic.
+_BLOAT_RE = re.compile(
+    r'\breverse\(reverse\((' + _balanced_args(3) + r')\)\)'
+    r'|\bnot_op\(not_op\((' + _balanced_args(3) + r')\)\)'
+    r'|\bneg\(neg\((' + _balanced_args(3) + r')\)\)'
+    r'|\b(?:add|sub)\((\w+),\s*0\)'
+    r'|\bmul\((\w+),\s*1\)'
+)
+
+
+def _bloat_repl(match: re.Match) -> str:
+    return next(g for g in match.groups() if g is not None)
+
+
+@functools.lru_cache(maxsize=4096)
+def _simplify_bloat(code: str) -> str:
+    """Rewrite `code` to a fixed point of _BLOAT_RE (memoized: candidates repeat a lot)."""
+    simpler = _BLOAT_RE.sub(_bloat_repl, code)
+    while simpler != code:
+        code, simpler = simpler, _BLOAT_RE.sub(_bloat_repl, simpler)
+    return simpler
+
+
+# Identifier tokens of a candidate, for exact (not substring) primitive matching.
+_IDENT_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+
 @dataclass
 class PrimitiveNode:
     name: str
@@ -415,8 +459,9 @@ class PrimitiveValidator:
         return passes / len(validation_ios)
 
 class LibraryManager:
-    def __init__(self, registry_path=REGISTRY_FILE):
+    def __init__(self, registry_path=REGISTRY_FILE, persist=True):
         self.registry_path = registry_path
+        self.persist = persist  # False: the registry is read but never written
         self.primitives: Dict[str, PrimitiveNode] = {}
         self.hasher = SemanticHasher()
         
@@ -880,6 +925,8 @@ class LibraryManager:
         self.runtime_primitives[node.name] = executed_func
 
     def save_registry(self):
+        if not self.persist:
+            return
         data = {}
         for name, node in self.primitives.items():
             if node.code == "<native>": continue
@@ -963,24 +1010,8 @@ class LibraryManager:
         Detects common tautologies/bloat that inflate complexity without value.
         True if code can be trivially simplified.
         """
-        original = code
-        simpler = code
-        
-        # Iterative reduction
-        prev = ""
-        while simpler != prev:
-            prev = simpler
-            simpler = simpler.replace("reverse(reverse(", "")
-            simpler = simpler.replace("not_op(not_op(", "")
-            simpler = simpler.replace("neg(neg(", "")
-            simpler = simpler.replace("add(n, 0)", "n")
-            simpler = simpler.replace("mul(n, 1)", "n")
-            simpler = simpler.replace("sub(n, 0)", "n")
-            
-            if simpler.endswith("))"):
-                 simpler = simpler.replace("))", ")") 
-        
-        if len(simpler) < len(original) * 0.8:
+        simpler = _simplify_bloat(code)
+        if len(simpler) < len(code) * 0.8:
              return True
         return False
 
@@ -1005,15 +1036,26 @@ class NeuroGeneticSynthesizer:
     }
     _TERNARY_OPS = {'if_then_else'}
     _QUATERNARY_OPS = {'if_gt', 'if_lt'}
-
-    def __init__(self, neural_guide=None, pop_size=200, generations=20, islands=3, checkpoint_path=None, use_meta_heuristic=True, **kwargs):
+    # Ops returning an Int/Scalar, for the scalar-root constraint
+    # (row_sums/col_sums return lists, so they are not in here)
+    _SCALAR_OPS = frozenset({
+        'len', 'sum_list', 'prod_list', 'min_list', 'max_list', 'count_list',
+        'matrix_sum', 'index_of', 'count_val',
+        'add', 'sub', 'mul', 'div', 'mod', 'pow', 'abs_val', 'neg'
+    })
+
+    def __init__(self, neural_guide=None, pop_size=200, generations=20, islands=3, checkpoint_path=None, use_meta_heuristic=True, persist=True, **kwargs):
         """
         Backwards-compatible init that ignores legacy params but keeps new safe architecture.
         use_meta_heuristic: If False, meta-learning weights are ignored (Control group mode).
+        persist: If False, the registry and meta weights are read but never written
+        (for concurrent workers sharing the on-disk state).
         """
-        self.library = LibraryManager()
+        self.library = LibraryManager(persist=persist)
         self.interpreter = SafeInterpreter(self.library.runtime_primitives)
         self.use_meta_heuristic = use_meta_heuristic
+        self.persist = persist
+        self._credit_window: List[str] = []  # recent solutions awaiting op credit
         
         # [TRUE RSI] Meta-Reasoning Failure Analyzer
         from meta_heuristic import FailureAnalyzer
@@ -1023,6 +1065,25 @@ class NeuroGeneticSynthesizer:
         for name, node in self.library.primitives.items():
             self.library._compile_primitive_runtime(node, self.interpreter)
 
+    def reset(self, seed: Optional[int] = None):
+        """
+        Prepare for an independent run.
+        Rebuilds the library from the registry on disk, so native primitive
+        weights and usage counts nudged by feedback() go back to their
+        defaults, clears failure-analysis state, and optionally reseeds the
+        search RNG.
+        """
+        from meta_heuristic import FailureAnalyzer
+        if seed is not None:
+            random.seed(seed)
+        self.failure_analyzer = FailureAnalyzer()
+        self.__dict__.pop('_banned_ops_history', None)
+        self._credit_window = []
+        self.library = LibraryManager(persist=self.persist)
+        self.interpreter = SafeInterpreter(self.library.runtime_primitives)
+        for name, node in self.library.primitives.items():
+            self.library._compile_primitive_runtime(node, self.interpreter)
+
     # ... (other methods unchanged) ...
     
     def register_primitive(self, name: str, func: Callable):
@@ -1053,26 +1114,32 @@ class NeuroGeneticSynthesizer:
         # [A] MULTIPLICATIVE MERGE: Library weights × Meta-learned weights
         from meta_heuristic import MetaHeuristic
         # If Control Group (use_meta_heuristic=False), disable IO to prevent contamination
-        meta_heuristic = MetaHeuristic(no_io=not self.use_meta_heuristic)
+        # and use uniform op weights (meta_w = 1.0 for every op)
+        meta_heuristic = MetaHeuristic(
+            no_io=not self.use_meta_heuristic,
+            mode="learned" if self.use_meta_heuristic else "uniform",
+            persist=self.persist,
+        )
         
         ops, lib_weights = self.library.get_weighted_ops()
-        meta_weights_dict = meta_heuristic.get_op_weights(ops)
         
         # Multiplicative merge: final_w[i] = lib_w[i] * meta_w[i]
-        weights = []
-        for i, op in enumerate(ops):
-            lib_w = lib_weights[i]
-            # If meta-learning is disabled (Control Group), force meta_w to 1.0
-            if not self.use_meta_heuristic:
-                meta_w = 1.0
-            else:
-                meta_w = meta_weights_dict.get(op, 1.0)
-            
-            final_w = lib_w * meta_w
-            weights.append(max(0.01, final_w))  # Ensure non-zero
+        if np is not None and ops:
+            # Parallel arrays: one multiply + one clamp instead of a per-op loop
+            # (fmax, like max() below, maps NaN to the floor)
+            meta_w = meta_heuristic.get_op_weights_array(ops)
+            final = np.asarray(lib_weights, dtype=np.float64) * meta_w
+            weights = np.fmax(final, 0.01).tolist()  # Ensure non-zero
+            meta_weights_dict = dict(zip(ops, meta_w.tolist()))
+        else:
+            meta_weights_dict = meta_heuristic.get_op_weights(ops)
+            weights = [
+                max(0.01, lib_w * meta_weights_dict.get(op, 1.0))  # Ensure non-zero
+                for op, lib_w in zip(ops, lib_weights)
+            ]
         
         # Store for later verification
-        self._current_meta_weights = meta_weights_dict if self.use_meta_heuristic else {op: 1.0 for op in ops}
+        self._current_meta_weights = meta_weights_dict
         self._current_merged_weights = dict(zip(ops, weights))
         
         # [TYPE-CONSTRAINT] Prune search space based on input/output types (Refined Instruction 3)
@@ -1148,6 +1215,8 @@ class NeuroGeneticSynthesizer:
                     self._record_success(code, io_pairs)
                     # [TRUE RSI] Organic Learning: Update persistent meta-weights on success
                     meta_heuristic.learn(code)
+                    if self.use_meta_heuristic:
+                        self._credit_ops(code, meta_heuristic)
                     best_programs.append((code, None, len(code), 1.0))
                     # Early exit on perfect solution? Or keep searching?
                     # Let's return immediate for speed
@@ -1245,13 +1314,19 @@ class NeuroGeneticSynthesizer:
 
     def _generate_initial_population(self, size, ops, weights, scalar_goal=False):
         pop = []
+        # Cumulative weights are shared by every node of every tree
+        cum_weights = list(itertools.accumulate(weights))
         for _ in range(size):
             # Generate random small expression trees
             depth = random.randint(1, 3)
-            pop.append(self._random_expr(depth, ops, weights, scalar_root=scalar_goal))
+            pop.append(self._random_expr(depth, ops, weights, scalar_root=scalar_goal, cum_weights=cum_weights))
         return pop
 
-    def _random_expr(self, depth, ops, weights, scalar_root=False):
+    def _random_expr(self, depth, ops, weights, scalar_root=False, cum_weights=None):
+        # random.choices(weights=...) re-accumulates the weights on every draw;
+        # passing cum_weights down draws the same ops without that O(len(ops)) pass
+        if cum_weights is None:
+            cum_weights = list(itertools.accumulate(weights))
         if depth <= 0 or (not scalar_root and random.random() < 0.3):
              # If scalar_root is True, we CANNOT return 'n' (which might be a list/matrix).
              # We MUST select a scalar op.
@@ -1264,18 +1339,12 @@ class NeuroGeneticSynthesizer:
         # If scalar_root is True, we must pick an operator that returns an Int/Scalar.
         # We assume _UNARY_OPS contains scalar reducers (sum, len, etc.)
         valid_ops = ops
-        valid_weights = weights
+        valid_cum_weights = cum_weights
         
         if scalar_root:
             # Filter ops to only those returning Int/Scalar
             # This is heuristic-based on common naming or explicit lists
-            scalar_ops = {
-                'len', 'sum_list', 'prod_list', 'min_list', 'max_list', 'count_list',
-                'matrix_sum', 'row_sums', 'col_sums', 'index_of', 'count_val',
-                'add', 'sub', 'mul', 'div', 'mod', 'pow', 'abs_val', 'neg'
-            }
-            # row_sums/col_sums return List, remove them!
-            scalar_ops.difference_update({'row_sums', 'col_sums'})
+            scalar_ops = self._SCALAR_OPS
             
             filtered = []
             f_weights = []
@@ -1286,14 +1355,14 @@ class NeuroGeneticSynthesizer:
             
             if filtered:
                 valid_ops = filtered
-                valid_weights = f_weights
+                valid_cum_weights = list(itertools.accumulate(f_weights))
         
         if not valid_ops: # Fallback if no scalar ops found
              if scalar_root: return "0" # Emergency constant
              valid_ops = ops
-             valid_weights = weights
+             valid_cum_weights = cum_weights
 
-        op = random.choices(valid_ops, weights=valid_weights, k=1)[0]
+        op = random.choices(valid_ops, cum_weights=valid_cum_weights, k=1)[0]
         # Basic Arity Check (Heuristic)
         # In a real system we'd inspect the signature.
         # Here we hardcode arity for Level 0, assume 1 for learned?
@@ -1310,7 +1379,7 @@ class NeuroGeneticSynthesizer:
             arity = 4
         
         # Recursive calls do NOT enforce scalar_root (only the top level did)
-        args = [self._random_expr(depth-1, ops, weights, scalar_root=False) for _ in range(arity)]
+        args = [self._random_expr(depth-1, ops, weights, scalar_root=False, cum_weights=cum_weights) for _ in range(arity)]
         return f"{op}({', '.join(args)})"
 
     def _evaluate(self, code: str, io_pairs: List[Dict]) -> float:
@@ -1440,12 +1509,28 @@ class NeuroGeneticSynthesizer:
             new_op = random.choices(valid_ops, weights=valid_weights, k=1)[0]
             return f"{new_op}({code})"
 
+    CREDIT_WINDOW = 3  # solutions per adaptive op-credit update
+
+    def _credit_ops(self, code: str, meta_heuristic) -> None:
+        """Every CREDIT_WINDOW solutions, credit the primitives they used to the meta weights."""
+        self._credit_window.append(code)
+        if len(self._credit_window) < self.CREDIT_WINDOW:
+            return
+        primitives = self.library.primitives
+        credits = collections.Counter(
+            tok for solution in self._credit_window for tok in _IDENT_RE.findall(solution) if tok in primitives
+        )
+        self._credit_window.clear()
+        if credits:
+            meta_heuristic.update_from_credits(credits)
+            meta_heuristic.save()
+
     def _record_success(self, code: str, io_pairs: List[Dict]):
-        # Extract primitives used
-        used = []
-        for name in self.library.primitives:
-            if name in code:
-                used.append(name)
+        # Extract primitives used: one tokenization, then dict lookups against
+        # the library bound once (a plain substring test would also credit
+        # e.g. 'add' for 'add_list'). Distinct tokens are far fewer than primitives.
+        primitives = self.library.primitives
+        used = [tok for tok in dict.fromkeys(_IDENT_RE.findall(code)) if tok in primitives]
         self.library.feedback(used, success=True)
         
         # Try to compress/learn? (RSI Step)
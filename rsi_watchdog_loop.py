@@ -2,7 +2,10 @@
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
+import hashlib
 import json
+import marshal
 import os
 import random
 import shutil
@@ -10,10 +13,15 @@ import time
 from dataclasses import dataclass
 from pathlib import Path
 from statistics import median
-from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 from watchdog_executor import WatchdogExecutor
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 META_WEIGHTS_FILE = "rsi_meta_weights.json"
 REGISTRY_FILE = "rsi_primitive_registry.json"
 
@@ -42,21 +50,25 @@ def normalize_caps(rounds: int, trials: int) -> Tuple[int, int]:
     return min(rounds, MAX_ROUNDS), min(trials, TRIALS_PER_ROUND)
 
 
+# IO pairs are identical for every task of a given type, so they are built
+# once and shared by reference; consumers only read them.
+_IO_TABLES: Dict[str, Tuple[Dict[str, int], ...]] = {
+    task_type: tuple({"input": n, "output": fn(n)} for n in range(5))
+    for task_type, fn in (
+        ("identity", lambda n: n),
+        ("double", lambda n: n * 2),
+        ("square", lambda n: n * n),
+    )
+}
+
+
 def build_tasks(seed: int, trials: int) -> List[Dict[str, Any]]:
     rng = random.Random(seed)
     tasks = []
-    task_types = ["identity", "double", "square"]
+    task_types = list(_IO_TABLES)
     for i in range(trials):
         task_type = task_types[i % len(task_types)]
-        io_pairs = []
-        for n in range(5):
-            if task_type == "identity":
-                io_pairs.append({"input": n, "output": n})
-            elif task_type == "double":
-                io_pairs.append({"input": n, "output": n * 2})
-            else:
-                io_pairs.append({"input": n, "output": n * n})
-        tasks.append({"id": f"task_{seed}_{i}", "type": task_type, "io_pairs": io_pairs})
+        tasks.append({"id": f"task_{seed}_{i}", "type": task_type, "io_pairs": _IO_TABLES[task_type]})
     rng.shuffle(tasks)
     return tasks
 
@@ -69,37 +81,169 @@ globals().update(_lib.runtime_primitives)
 """
 
 
-def run_watchdog_snippet(code: str, timeout: float) -> Dict[str, Any]:
-    executor = WatchdogExecutor(timeout=timeout)
-    return executor.run_safe(code, timeout=timeout)
+_PRELUDE = _primitive_prelude()
 
 
-def evaluate_code_with_watchdog(code: str, io_pairs: Iterable[Dict[str, Any]], timeout: float) -> Tuple[bool, Optional[float]]:
-    start = time.time()
-    for pair in io_pairs:
-        value = pair["input"]
-        expected = pair["output"]
-        if code.strip().startswith("def "):
-            snippet = f"""
-{_primitive_prelude()}
+_EXECUTOR: Optional[WatchdogExecutor] = None
+
+
+def _get_executor(timeout: float) -> WatchdogExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = WatchdogExecutor(timeout=timeout)
+    return _EXECUTOR
+
+
+_SETUP_REGISTRY_STAMP: Optional[int] = None
+
+
+def _registry_stamp() -> Optional[int]:
+    try:
+        return os.stat(REGISTRY_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def run_watchdog_snippet(
+    code: Union[str, bytes],
+    timeout: float,
+    inputs: Optional[Dict[str, Any]] = None,
+    setup: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Run `code` under the watchdog. With `setup`, a persistent worker runs it
+    once and is restarted whenever the primitive registry changes on disk.
+    """
+    global _SETUP_REGISTRY_STAMP
+    executor = _get_executor(timeout)
+    if setup is None:
+        return executor.run_safe(code, timeout=timeout, inputs=inputs)
+    stamp = _registry_stamp()
+    if stamp != _SETUP_REGISTRY_STAMP:
+        executor.stop_workers()
+        _SETUP_REGISTRY_STAMP = stamp
+    return executor.run_with_setup(setup, code, timeout=timeout, inputs=inputs)
+
+
+def build_candidate_snippet(code: str) -> str:
+    """
+    Wrap a candidate so it runs over every input in `_inputs` in a single
+    sandbox call. Primitives come from the `_PRELUDE` setup, not the snippet.
+    """
+    if code.strip().startswith("def "):
+        return f"""
 {code}
-result = solve({value!r})
+result = list(map(solve, _inputs))
 """
-        else:
-            snippet = f"""
-{_primitive_prelude()}
-
+    return f"""
 def solve(n):
     return {code}
 
-result = solve({value!r})
+result = list(map(solve, _inputs))
 """
-        result = run_watchdog_snippet(snippet, timeout)
-        if not result.get("success"):
-            return False, None
-        if result.get("result") != expected:
-            return False, None
-    return True, time.time() - start
+
+
+# (code, ((input, output), ...)) -> passed. Candidates are regenerated often
+# across trials and rounds; a hit skips the sandbox entirely. Verdicts depend on
+# the primitives, so the cache is dropped whenever the registry changes on disk.
+_EVAL_CACHE: Dict[Tuple[str, Tuple[Tuple[Any, Any], ...]], bool] = {}
+_EVAL_CACHE_MAX = 10_000
+_EVAL_CACHE_STAMP: Optional[int] = None
+
+
+def _check_io_pairs(code: str, io_pairs: List[Dict[str, Any]], timeout: float) -> Optional[bool]:
+    """Run the candidate once over all pairs; None means the run was killed (not cacheable)."""
+    try:
+        # Compiled once here; the worker only marshal.loads() the bytecode
+        compiled = marshal.dumps(compile(build_candidate_snippet(code), "<candidate>", "exec"))
+    except (SyntaxError, ValueError):
+        return False
+    if not io_pairs:
+        return True
+    # One sandbox launch for all pairs; the budget still scales per pair
+    inputs = tuple(pair["input"] for pair in io_pairs)
+    result = run_watchdog_snippet(
+        compiled, timeout * len(io_pairs), inputs={"_inputs": inputs}, setup=_PRELUDE
+    )
+    if result.get("killed"):
+        return None
+    if not result.get("success"):
+        return False
+    outputs = result.get("result") or ()
+    if len(outputs) != len(io_pairs):
+        return False
+    return all(output == pair["output"] for pair, output in zip(io_pairs, outputs))
+
+
+def evaluate_code_with_watchdog(code: str, io_pairs: Iterable[Dict[str, Any]], timeout: float) -> Tuple[bool, Optional[float]]:
+    global _EVAL_CACHE_STAMP
+    start = time.perf_counter()
+    io_pairs = list(io_pairs)
+    stamp = _registry_stamp()
+    if stamp != _EVAL_CACHE_STAMP:
+        _EVAL_CACHE.clear()
+        _EVAL_CACHE_STAMP = stamp
+    try:
+        key = (code, tuple((pair["input"], pair["output"]) for pair in io_pairs))
+        ok = _EVAL_CACHE.get(key)
+    except TypeError:  # unhashable IO values - evaluate uncached
+        key, ok = None, None
+    if ok is None:
+        ok = _check_io_pairs(code, io_pairs, timeout)
+        if ok is not None and key is not None:
+            if len(_EVAL_CACHE) >= _EVAL_CACHE_MAX:
+                del _EVAL_CACHE[next(iter(_EVAL_CACHE))]  # FIFO eviction
+            _EVAL_CACHE[key] = ok
+    if not ok:
+        return False, None
+    return True, time.perf_counter() - start
+
+
+# Programs recognisable from the IO pairs alone: (code, pair predicate).
+_PEEPHOLES: Tuple[Tuple[str, Callable[[Dict[str, Any]], bool]], ...] = (
+    ("n", lambda pair: pair["output"] == pair["input"]),
+    (
+        "sum_list(n)",
+        lambda pair: isinstance(pair["input"], list)
+        and all(type(x) is int for x in pair["input"])
+        and pair["output"] == sum(pair["input"]),
+    ),
+)
+
+
+def peephole_program(io_pairs: Iterable[Dict[str, Any]]) -> Optional[str]:
+    """Return a program that trivially satisfies every pair, or None."""
+    io_pairs = list(io_pairs)
+    if not io_pairs:
+        return None
+    for code, matches in _PEEPHOLES:
+        if all(matches(pair) for pair in io_pairs):
+            return code
+    return None
+
+
+def run_one_trial(
+    synth: Any,
+    task: Dict[str, Any],
+    synth_timeout: float,
+    watchdog_timeout: float,
+    peephole: bool = False,
+) -> TrialResult:
+    start = time.perf_counter()
+    if peephole:
+        code = peephole_program(task["io_pairs"])
+        if code is not None:
+            return TrialResult(success=True, elapsed_s=time.perf_counter() - start, code=code)
+    code = None
+    success = False
+    for candidate in synth.synthesize(task["io_pairs"], timeout=synth_timeout):
+        code = candidate[0]
+        ok, _ = evaluate_code_with_watchdog(code, task["io_pairs"], watchdog_timeout)
+        if ok:
+            success = True
+            break
+    elapsed = time.perf_counter() - start
+    return TrialResult(success=success, elapsed_s=elapsed, code=code)
 
 
 def run_trials(
@@ -108,22 +252,57 @@ def run_trials(
     use_meta: bool,
     synth_timeout: float,
     watchdog_timeout: float,
+    peephole: bool = False,
 ) -> List[TrialResult]:
-    results: List[TrialResult] = []
     synth = synth_factory(use_meta)
-    for task in tasks:
-        start = time.time()
-        code = None
-        success = False
-        for candidate in synth.synthesize(task["io_pairs"], timeout=synth_timeout):
-            code = candidate[0]
-            ok, _ = evaluate_code_with_watchdog(code, task["io_pairs"], watchdog_timeout)
-            if ok:
-                success = True
-                break
-        elapsed = time.time() - start
-        results.append(TrialResult(success=success, elapsed_s=elapsed, code=code))
-    return results
+    return [run_one_trial(synth, task, synth_timeout, watchdog_timeout, peephole) for task in tasks]
+
+
+def _run_one_trial(
+    task: Dict[str, Any],
+    use_meta: bool,
+    synth_timeout: float,
+    watchdog_timeout: float,
+    peephole: bool = False,
+    seed: Optional[int] = None,
+) -> TrialResult:
+    """
+    Process-pool entry point. Each trial gets a fresh synthesizer, built inside
+    the worker from the on-disk state and seeded with `seed`; it never writes
+    that state back, so concurrent trials cannot race on the artifacts and a
+    trial's outcome does not depend on which worker ran it, or after what.
+    """
+    from neuro_genetic_synthesizer import NeuroGeneticSynthesizer
+
+    synth = NeuroGeneticSynthesizer(use_meta_heuristic=use_meta, persist=False)
+    if seed is not None:
+        random.seed(seed)
+    return run_one_trial(synth, task, synth_timeout, watchdog_timeout, peephole)
+
+
+def run_control_parallel(
+    tasks: List[Dict[str, Any]],
+    synth_timeout: float,
+    watchdog_timeout: float,
+    workers: int,
+    peephole: bool = False,
+    seed: int = 0,
+) -> List[TrialResult]:
+    """
+    Run the control trials concurrently. Trial i is seeded with
+    seed * TRIALS_PER_ROUND + i. Workers do not persist what they learn, so
+    only the control condition, which is not meant to learn, is run this way;
+    the treatment has to carry its learning from trial to trial and stays serial.
+    """
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                _run_one_trial, task, False, synth_timeout, watchdog_timeout, peephole,
+                seed * TRIALS_PER_ROUND + i,
+            )
+            for i, task in enumerate(tasks)
+        ]
+        return [future.result() for future in futures]
 
 
 def summarize_round(round_idx: int, control: List[TrialResult], treatment: List[TrialResult]) -> RoundSummary:
@@ -140,12 +319,38 @@ def summarize_round(round_idx: int, control: List[TrialResult], treatment: List[
     )
 
 
+# Source path -> (content digest, most recent snapshot of it)
+_LAST_SNAPSHOT: Dict[Path, Tuple[str, Path]] = {}
+
+
 def snapshot_artifacts(output_dir: Path) -> None:
+    """Copy the persisted artifacts, hardlinking to the previous snapshot when unchanged."""
     output_dir.mkdir(parents=True, exist_ok=True)
     for filename in (META_WEIGHTS_FILE, REGISTRY_FILE):
         path = Path(filename)
-        if path.exists():
-            shutil.copy2(path, output_dir / path.name)
+        if not path.exists():
+            continue
+        digest = hashlib.blake2b(path.read_bytes(), digest_size=16).hexdigest()
+        target = output_dir / path.name
+        source = path.resolve()
+        last = _LAST_SNAPSHOT.get(source)
+        linked = False
+        if last is not None and last[0] == digest and last[1].exists():
+            try:
+                os.link(last[1], target)
+                linked = True
+            except OSError:
+                # Target already present, cross-device, or no hardlink support
+                pass
+        if not linked:
+            shutil.copy2(path, target)
+        _LAST_SNAPSHOT[source] = (digest, target)
+
+
+def _dumps_compact(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"))
 
 
 def write_summary(output_dir: Path, summaries: List[RoundSummary]) -> None:
@@ -165,6 +370,8 @@ def run_loop(
     synth_timeout: float,
     watchdog_timeout: float,
     output_root: Path,
+    workers: int = 1,
+    peephole: bool = False,
 ) -> Path:
     rounds, trials = normalize_caps(rounds, trials)
     timestamp = time.strftime("%Y%m%d_%H%M%S")
@@ -174,34 +381,56 @@ def run_loop(
     summaries: List[RoundSummary] = []
     metrics_path = output_dir / "metrics.jsonl"
 
-    for round_idx in range(rounds):
-        tasks = build_tasks(seed + round_idx, trials)
-        snapshot_artifacts(output_dir / f"round_{round_idx}_before")
-
-        from neuro_genetic_synthesizer import NeuroGeneticSynthesizer
+    # One synthesizer per serial condition, reset each round
+    from neuro_genetic_synthesizer import NeuroGeneticSynthesizer
 
-        control_results = run_trials(
-            tasks,
-            lambda _: NeuroGeneticSynthesizer(use_meta_heuristic=False),
-            use_meta=False,
-            synth_timeout=synth_timeout,
-            watchdog_timeout=watchdog_timeout,
+    control_synth = None
+    if workers <= 1:
+        control_synth = NeuroGeneticSynthesizer(use_meta_heuristic=False)
+    else:
+        print(
+            f"[RSI Loop] Warning: --workers {workers} parallelizes the control condition only; "
+            "treatment runs serially so it keeps what it learns between trials"
         )
-        treatment_results = run_trials(
-            tasks,
-            lambda _: NeuroGeneticSynthesizer(use_meta_heuristic=True),
-            use_meta=True,
-            synth_timeout=synth_timeout,
-            watchdog_timeout=watchdog_timeout,
-        )
-
-        summary = summarize_round(round_idx, control_results, treatment_results)
-        summaries.append(summary)
+    treatment_synth = NeuroGeneticSynthesizer(use_meta_heuristic=True)
 
-        with metrics_path.open("a", encoding="utf-8") as handle:
-            handle.write(json.dumps(summary.__dict__) + "\n")
+    with metrics_path.open("w", encoding="utf-8", buffering=1024 * 1024) as metrics_handle:
+        for round_idx in range(rounds):
+            tasks = build_tasks(seed + round_idx, trials)
+            snapshot_artifacts(output_dir / f"round_{round_idx}_before")
 
-        snapshot_artifacts(output_dir / f"round_{round_idx}_after")
+            if workers > 1:
+                control_results = run_control_parallel(
+                    tasks, synth_timeout, watchdog_timeout, workers, peephole, seed=seed + round_idx
+                )
+            else:
+                control_synth.reset(seed=seed + round_idx)
+                control_results = run_trials(
+                    tasks,
+                    lambda _: control_synth,
+                    use_meta=False,
+                    synth_timeout=synth_timeout,
+                    watchdog_timeout=watchdog_timeout,
+                    peephole=peephole,
+                )
+            treatment_synth.reset(seed=seed + round_idx)
+            treatment_results = run_trials(
+                tasks,
+                lambda _: treatment_synth,
+                use_meta=True,
+                synth_timeout=synth_timeout,
+                watchdog_timeout=watchdog_timeout,
+                peephole=peephole,
+            )
+
+            summary = summarize_round(round_idx, control_results, treatment_results)
+            summaries.append(summary)
+
+            metrics_handle.write(_dumps_compact(summary.__dict__) + "\n")
+            # One flush per round keeps metrics.jsonl tail-able by read_latest_metrics.py
+            metrics_handle.flush()
+
+            snapshot_artifacts(output_dir / f"round_{round_idx}_after")
 
     write_summary(output_dir, summaries)
     return output_dir
@@ -215,6 +444,20 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--synth-timeout", type=float, default=2.0)
     parser.add_argument("--watchdog-timeout", type=float, default=WATCHDOG_TIMEOUT_SEC)
     parser.add_argument("--output-root", type=Path, default=Path("runs"))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes for running control trials concurrently (1 = serial); "
+        "treatment always runs serially so its learning carries between trials",
+    )
+    parser.add_argument(
+        "--peephole",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Solve tasks recognisable from their IO pairs (identity, list sum) without synthesis; "
+        "off by default so both arms measure synthesis alone",
+    )
     return parser.parse_args()
 
 
@@ -227,6 +470,8 @@ def main() -> int:
         synth_timeout=args.synth_timeout,
         watchdog_timeout=args.watchdog_timeout,
         output_root=args.output_root,
+        workers=args.workers,
+        peephole=args.peephole,
     )
     return 0
 
@@ -6,9 +6,17 @@ Uses the Visitor Pattern to traverse and execute DSL expressions safely.
 Only whitelisted operations are allowed.
 """
 
-import ast
+import array
+import itertools
+import operator
+import sys
+import weakref
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Callable, Union
+from typing import Any, Dict, List, Optional, Callable, Tuple, Union
+
+if sys.version_info < (3, 11):
+    # Fail with a clear message instead of a TypeError from @dataclass below
+    raise ImportError("safe_interpreter requires Python 3.11+ (dataclass weakref_slot)")
 
 
 class SecurityError(Exception):
@@ -21,29 +29,172 @@ class ExecutionError(Exception):
     pass
 
 
-@dataclass
+# weakref_slot (for the intern table) needs Python 3.11+, slots 3.10+
+@dataclass(frozen=True, slots=True, weakref_slot=True)
 class DSLExpr:
-    """Base class for DSL expressions."""
-    pass
+    """
+    Base class for DSL expressions.
+    
+    Nodes are immutable and slotted (no per-instance __dict__). Nodes
+    built with mk_var/mk_val/mk_app (or passed through intern_expr) are
+    hash-consed: structurally identical subtrees are the same object and
+    carry a unique `_id`. Derived data (size, semantic hash, bytecode) is
+    cached on the node the first time it is computed.
+    """
+    _id: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+    _size: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+    _hash: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _program: Optional['Program'] = field(default=None, init=False, repr=False, compare=False)
+    
+    def size(self) -> int:
+        """AST node count."""
+        return 1
+    
+    def canonicalize(self, var_map: Dict[str, int]) -> str:
+        """Canonical string with variables renamed in order of first use."""
+        return "?"
 
 
-@dataclass
+def _param_index(name: str) -> int:
+    """i for a primitive parameter name 'var_i', else -1."""
+    if name.startswith('var_'):
+        digits = name[4:]
+        if digits.isascii() and digits.isdigit() and str(int(digits)) == digits:
+            return int(digits)
+    return -1
+
+
+@dataclass(frozen=True, slots=True)
 class DSLVar(DSLExpr):
     """Variable reference."""
     name: str
+    # Primitive parameter index for 'var_i' names, else -1
+    param_idx: int = field(default=-1, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        object.__setattr__(self, 'param_idx', _param_index(self.name))
+    
+    def canonicalize(self, var_map: Dict[str, int]) -> str:
+        # Rename variables to canonical form
+        if self.name not in var_map:
+            var_map[self.name] = len(var_map)
+        return f"X{var_map[self.name]}"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DSLVal(DSLExpr):
     """Literal value."""
     value: Any
+    
+    def canonicalize(self, var_map: Dict[str, int]) -> str:
+        return f"V({self.value})"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DSLApp(DSLExpr):
     """Function application."""
     func: str
-    args: List[DSLExpr] = field(default_factory=list)
+    args: Tuple[DSLExpr, ...] = field(default_factory=tuple)
+    # Index into _OPS_TABLE, resolved once here; OP_CUSTOM for everything else
+    func_id: int = field(default=-1, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Accept lists for convenience but store an immutable tuple
+        if not isinstance(self.args, tuple):
+            object.__setattr__(self, 'args', tuple(self.args))
+        object.__setattr__(self, 'func_id', _OP_NAME_TO_ID.get(self.func, OP_CUSTOM))
+    
+    def size(self) -> int:
+        """AST node count (cached on the node)."""
+        size = self._size
+        if size is None:
+            size = 1 + sum(arg.size() for arg in self.args)
+            object.__setattr__(self, '_size', size)
+        return size
+    
+    def canonicalize(self, var_map: Dict[str, int]) -> str:
+        args_str = ",".join(arg.canonicalize(var_map) for arg in self.args)
+        return f"{self.func}({args_str})"
+
+
+# Hash-consing table: structural key -> the single live node with that structure
+_intern_table: "weakref.WeakValueDictionary[tuple, DSLExpr]" = weakref.WeakValueDictionary()
+_next_id = itertools.count(1)
+
+
+def _intern(key: tuple, make: Callable[[], DSLExpr]) -> DSLExpr:
+    node = _intern_table.get(key)
+    if node is None:
+        node = make()
+        object.__setattr__(node, '_id', next(_next_id))
+        _intern_table[key] = node
+    return node
+
+
+def mk_var(name: str) -> DSLVar:
+    """Interned variable reference."""
+    return _intern(('var', name), lambda: DSLVar(name))
+
+
+def mk_val(value: Any) -> DSLVal:
+    """Interned literal; unhashable values (e.g. lists) get a fresh, un-interned node."""
+    try:
+        key = ('val', type(value), value)
+        hash(key)
+    except TypeError:
+        return DSLVal(value)
+    return _intern(key, lambda: DSLVal(value))
+
+
+def mk_app(func: str, args: Union[List[DSLExpr], Tuple[DSLExpr, ...]] = ()) -> DSLExpr:
+    """Interned application; children are interned first so equal subtrees are shared."""
+    args = tuple(intern_expr(arg) for arg in args)
+    if any(arg._id is None for arg in args):
+        return DSLApp(func, args)
+    return _intern(('app', func, tuple(arg._id for arg in args)), lambda: DSLApp(func, args))
+
+
+def intern_expr(expr: DSLExpr) -> DSLExpr:
+    """Return the hash-consed equivalent of an arbitrary expression tree."""
+    if expr._id is not None:
+        return expr
+    if isinstance(expr, DSLVar):
+        return mk_var(expr.name)
+    if isinstance(expr, DSLVal):
+        return mk_val(expr.value)
+    if isinstance(expr, DSLApp):
+        return mk_app(expr.func, expr.args)
+    return expr
+
+
+_MISSING = object()
+
+
+def _bound_value(name: str, env: Dict[str, Any], params: tuple) -> Any:
+    """Value `name` resolves to under (env, params), or _MISSING."""
+    idx = _param_index(name)
+    if 0 <= idx < len(params):
+        return params[idx]
+    return env.get(name, _MISSING)
+
+# Bytecode opcodes (see SafeInterpreter.compile); each instruction is 3 ints
+PUSH_CONST, LOAD_VAR, CALL_OP, CALL_CUSTOM = 0, 1, 2, 3
+
+
+@dataclass
+class Program:
+    """
+    Postorder bytecode for one DSL expression.
+    
+    `code` holds (opcode, arg, arity) triples: PUSH_CONST/LOAD_VAR index
+    into `consts`/`var_names`; CALL_OP's arg is a built-in opcode and
+    CALL_CUSTOM's arg is the index of the primitive name in `consts`.
+    `var_params` holds each variable's primitive parameter index (or -1).
+    """
+    code: array.array
+    consts: List[Any]
+    var_names: List[str]
+    var_params: List[int] = field(default_factory=list)
 
 
 class SafeInterpreter:
@@ -54,16 +205,17 @@ class SafeInterpreter:
     Only whitelisted operations are allowed.
     """
     
-    # Whitelisted primitive operations
+    # Whitelisted primitive operations. Plain operators map to the C-level
+    # `operator` functions; anything guarded or arity-sensitive stays a lambda.
     ALLOWED_OPS: Dict[str, Callable] = {
         # Arithmetic
-        'add': lambda a, b: a + b,
-        'sub': lambda a, b: a - b,
-        'mul': lambda a, b: a * b,
+        'add': operator.add,
+        'sub': operator.sub,
+        'mul': operator.mul,
         'div': lambda a, b: a // b if b != 0 else 0,
         'mod': lambda a, b: a % b if b != 0 else 0,
-        'neg': lambda a: -a,
-        'abs': lambda a: abs(a),
+        'neg': operator.neg,
+        'abs': abs,
         'min': lambda a, b: min(a, b),
         'max': lambda a, b: max(a, b),
         
@@ -71,15 +223,15 @@ class SafeInterpreter:
         'if_gt': lambda a, b, t, f: t if a > b else f,
         'if_eq': lambda a, b, t, f: t if a == b else f,
         'if_lt': lambda a, b, t, f: t if a < b else f,
-        'eq': lambda a, b: a == b,
-        'gt': lambda a, b: a > b,
-        'lt': lambda a, b: a < b,
+        'eq': operator.eq,
+        'gt': operator.gt,
+        'lt': operator.lt,
         
         # Boolean
         'and_op': lambda a, b: a and b,
         'or_op': lambda a, b: a or b,
-        'not_op': lambda a: not a,
-        'xor_op': lambda a, b: a != b,
+        'not_op': operator.not_,
+        'xor_op': operator.ne,
         
         # List/String operations
         'len': lambda x: len(x) if hasattr(x, '__len__') else 0,
@@ -98,10 +250,21 @@ class SafeInterpreter:
     
     # Maximum execution steps to prevent infinite loops
     MAX_STEPS = 10000
+    # Node ids are never reused, so entries for dead nodes are dropped by
+    # clearing the free-variable cache once it reaches this size
+    FREE_VARS_CACHE_MAX = 4096
     
     def __init__(self):
         self._custom_primitives: Dict[str, 'DSLExpr'] = {}
+        # Built-in opcode -> this interpreter's implementation (see _ops_for_run)
+        self._ops_table: Tuple[Optional[Callable], ...] = ()
+        self._ops_source: Optional[Dict[str, Callable]] = None
         self._step_count = 0
+        # Per-run memo of custom primitive results:
+        # (body id, free var values, their types) -> value
+        self._memo: Dict[Tuple[int, tuple, tuple], Any] = {}
+        # node id -> sorted free variable names (None = not memoizable, e.g. recursive)
+        self._free_vars_cache: Dict[int, Optional[Tuple[str, ...]]] = {}
     
     def register_primitive(self, name: str, expr: DSLExpr) -> None:
         """
@@ -115,19 +278,62 @@ class SafeInterpreter:
             raise SecurityError(f"Invalid primitive name: {name}")
         if name in self.ALLOWED_OPS:
             raise SecurityError(f"Cannot override built-in: {name}")
-        self._custom_primitives[name] = expr
+        self._custom_primitives[name] = intern_expr(expr)
+        self._free_vars_cache.clear()
     
     def unregister_primitive(self, name: str) -> bool:
         """Remove a custom primitive."""
         if name in self._custom_primitives:
             del self._custom_primitives[name]
+            self._free_vars_cache.clear()
             return True
         return False
     
+    def _free_vars(self, expr: DSLExpr, visiting: Optional[set] = None) -> Optional[Tuple[str, ...]]:
+        """
+        Variables an interned node reads from its environment, or None if
+        it cannot be memoized. Custom primitive bodies see the caller's env
+        (plus var_i bindings), so their unbound reads count too.
+        """
+        if expr._id in self._free_vars_cache:
+            return self._free_vars_cache[expr._id]
+        if isinstance(expr, DSLVal):
+            return ()
+        if isinstance(expr, DSLVar):
+            return (expr.name,)
+        if not isinstance(expr, DSLApp) or expr._id is None:
+            return None
+        visiting = set() if visiting is None else visiting
+        if expr._id in visiting:
+            return None  # recursive primitive
+        visiting.add(expr._id)
+        names = set()
+        result: Optional[Tuple[str, ...]] = None
+        for arg in expr.args:
+            arg_vars = self._free_vars(arg, visiting)
+            if arg_vars is None:
+                break
+            names.update(arg_vars)
+        else:
+            body = self._custom_primitives.get(expr.func)
+            body_vars = () if body is None else self._free_vars(body, visiting)
+            if body_vars is not None:
+                bound = {f'var_{i}' for i in range(len(expr.args))}
+                names.update(v for v in body_vars if v not in bound)
+                result = tuple(sorted(names))
+        visiting.discard(expr._id)
+        if len(self._free_vars_cache) >= self.FREE_VARS_CACHE_MAX:
+            self._free_vars_cache.clear()
+        self._free_vars_cache[expr._id] = result
+        return result
+    
     def run(self, expr: DSLExpr, env: Dict[str, Any]) -> Any:
         """
         Execute a DSL expression safely.
         
+        The expression is compiled once (the bytecode is cached on the
+        node) and executed by run_program().
+        
         Args:
             expr: DSL expression tree
             env: Variable bindings (e.g., {'n': 5})
@@ -139,70 +345,211 @@ class SafeInterpreter:
             SecurityError: If unsafe operation attempted
             ExecutionError: If execution fails
         """
+        return self.run_program(self.compile(expr), env)
+    
+    def _memo_key(self, body: DSLExpr, env: Dict[str, Any], params: tuple) -> Optional[tuple]:
+        """
+        Memo key for running a primitive body under (env, params), or None.
+        The DSL is pure, so an interned body run with the same values for the
+        variables it reads always yields the same result. Types are part of
+        the key: 1, 1.0 and True compare (and hash) equal.
+        """
+        if body._id is None:
+            return None
+        names = self._free_vars(body)
+        if names is None:
+            return None
+        bound = tuple(_bound_value(name, env, params) for name in names)
+        if _MISSING in bound:
+            return None
+        key = (body._id, bound, tuple(map(type, bound)))
+        try:
+            hash(key)
+        except TypeError:  # unhashable binding
+            return None
+        return key
+    
+    def compile(self, expr: DSLExpr) -> Program:
+        """
+        Flatten an expression into postorder bytecode for run_program().
+        
+        The program is cached on the node. It does not depend on the
+        interpreter: custom primitives are resolved by name at run time,
+        so cached programs stay valid when primitives change.
+        """
+        if expr._program is not None:
+            return expr._program
+        
+        code = array.array('i')
+        consts: List[Any] = []
+        var_names: List[str] = []
+        var_params: List[int] = []
+        var_index: Dict[str, int] = {}
+        stack = [(expr, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if isinstance(node, DSLVal):
+                code.extend((PUSH_CONST, len(consts), 0))
+                consts.append(node.value)
+            elif isinstance(node, DSLVar):
+                if node.name not in var_index:
+                    var_index[node.name] = len(var_names)
+                    var_names.append(node.name)
+                    var_params.append(node.param_idx)
+                code.extend((LOAD_VAR, var_index[node.name], 0))
+            elif isinstance(node, DSLApp):
+                if expanded:
+                    if node.func_id >= 0:
+                        code.extend((CALL_OP, node.func_id, len(node.args)))
+                    else:
+                        code.extend((CALL_CUSTOM, len(consts), len(node.args)))
+                        consts.append(node.func)
+                else:
+                    stack.append((node, True))
+                    stack.extend((arg, False) for arg in reversed(node.args))
+            else:
+                raise SecurityError(f"Unknown expression type: {type(node)}")
+        
+        program = Program(code=code, consts=consts, var_names=var_names, var_params=var_params)
+        object.__setattr__(expr, '_program', program)
+        return program
+    
+    def run_program(self, program: Program, env: Dict[str, Any]) -> Any:
+        """
+        Execute compiled bytecode with an explicit stack (no recursion
+        except into custom primitive bodies, whose results are memoized
+        for the duration of the call). Raises like run().
+        """
         self._step_count = 0
+        self._memo = {}
+        if self._ops_source is not self.ALLOWED_OPS:
+            self._ops_for_run()
         try:
-            return self._eval(expr, env)
+            return self._exec_program(program, env, ())
         except (SecurityError, ExecutionError):
             raise
         except Exception as e:
             raise ExecutionError(f"Execution failed: {e}")
+        finally:
+            self._memo = {}
     
-    def _eval(self, expr: DSLExpr, env: Dict[str, Any]) -> Any:
-        """Recursive evaluation with step counting."""
-        self._step_count += 1
-        if self._step_count > self.MAX_STEPS:
-            raise ExecutionError("Maximum execution steps exceeded")
-        
-        # Pattern match on expression type
-        if isinstance(expr, DSLVal):
-            return expr.value
-        
-        elif isinstance(expr, DSLVar):
-            if expr.name not in env:
-                raise ExecutionError(f"Undefined variable: {expr.name}")
-            return env[expr.name]
-        
-        elif isinstance(expr, DSLApp):
-            return self._eval_app(expr, env)
+    def _ops_for_run(self) -> None:
+        """
+        Resolve the built-in opcodes against this interpreter's ALLOWED_OPS.
         
-        else:
-            raise SecurityError(f"Unknown expression type: {type(expr)}")
+        Programs are compiled against the base class's table, so a subclass
+        or instance that assigns its own ALLOWED_OPS gets its implementations
+        here: opcodes it dropped resolve to None, and names it added are
+        looked up by name on the custom-primitive path. The table is rebuilt
+        whenever ALLOWED_OPS is rebound; mutating the dict in place is not
+        picked up.
+        """
+        ops = self.ALLOWED_OPS
+        self._ops_table = tuple(ops.get(name) for name in _OP_NAMES)
+        self._ops_source = ops
     
-    def _eval_app(self, expr: DSLApp, env: Dict[str, Any]) -> Any:
-        """Evaluate function application."""
-        func_name = expr.func
-        
-        # Check for built-in operation
-        if func_name in self.ALLOWED_OPS:
-            # Evaluate arguments
-            args = [self._eval(arg, env) for arg in expr.args]
-            # Apply built-in
-            try:
-                return self.ALLOWED_OPS[func_name](*args)
-            except TypeError as e:
-                raise ExecutionError(f"Arity mismatch for {func_name}: {e}")
-        
-        # Check for custom primitive
-        elif func_name in self._custom_primitives:
-            primitive_expr = self._custom_primitives[func_name]
-            # Evaluate arguments
-            arg_values = [self._eval(arg, env) for arg in expr.args]
-            # Create new environment with argument bindings
-            # Assuming primitives use var_0, var_1, etc.
-            new_env = env.copy()
-            for i, val in enumerate(arg_values):
-                new_env[f'var_{i}'] = val
-            # Recursively evaluate the primitive's body
-            return self._eval(primitive_expr, new_env)
+    def _exec_program(self, program: Program, env: Dict[str, Any], params: tuple) -> Any:
+        """
+        `params` holds the var_0..var_k bindings of the enclosing custom
+        primitive calls (innermost first); they shadow `env`, which is
+        never copied.
+        """
+        code = program.code
+        consts = program.consts
+        ops = self._ops_table
+        values = []
+        n_params = len(params)
+        for name, idx in zip(program.var_names, program.var_params):
+            if 0 <= idx < n_params:
+                values.append(params[idx])
+            elif name in env:
+                values.append(env[name])
+            else:
+                raise ExecutionError(f"Undefined variable: {name}")
         
-        else:
-            raise SecurityError(f"Unknown function: {func_name}")
+        stack: List[Any] = []
+        push = stack.append
+        n_code = len(code)
+        steps = self._step_count
+        pc = 0
+        while pc < n_code:
+            opcode = code[pc]
+            arg = code[pc + 1]
+            pc += 3
+            steps += 1
+            if steps > self.MAX_STEPS:
+                raise ExecutionError("Maximum execution steps exceeded")
+            if opcode == LOAD_VAR:
+                push(values[arg])
+            elif opcode == PUSH_CONST:
+                push(consts[arg])
+            elif opcode == CALL_OP:
+                arity = code[pc - 1]
+                fn = ops[arg]
+                if fn is None:
+                    raise SecurityError(f"Unknown function: {_OP_NAMES[arg]}")
+                try:
+                    if arity == 2:
+                        b = stack.pop()
+                        stack[-1] = fn(stack[-1], b)
+                    elif arity == 1:
+                        stack[-1] = fn(stack[-1])
+                    elif arity == 4:
+                        f = stack.pop()
+                        t = stack.pop()
+                        b = stack.pop()
+                        stack[-1] = fn(stack[-1], b, t, f)
+                    else:
+                        call_args = stack[len(stack) - arity:] if arity else []
+                        del stack[len(stack) - arity:]
+                        push(fn(*call_args))
+                except TypeError as e:
+                    raise ExecutionError(f"Arity mismatch for {_OP_NAMES[arg]}: {e}")
+            else:  # CALL_CUSTOM
+                arity = code[pc - 1]
+                func_name = consts[arg]
+                body = self._custom_primitives.get(func_name)
+                call_args = tuple(stack[len(stack) - arity:]) if arity else ()
+                del stack[len(stack) - arity:]
+                if body is None:
+                    # A built-in that only a subclass/instance ALLOWED_OPS defines
+                    fn = self.ALLOWED_OPS.get(func_name)
+                    if fn is None:
+                        raise SecurityError(f"Unknown function: {func_name}")
+                    try:
+                        push(fn(*call_args))
+                    except TypeError as e:
+                        raise ExecutionError(f"Arity mismatch for {func_name}: {e}")
+                    continue
+                # New bindings shadow the caller's; higher-numbered caller
+                # bindings stay visible
+                call_params = call_args + params[arity:]
+                key = self._memo_key(body, env, call_params)
+                if key is not None:
+                    value = self._memo.get(key, _MISSING)
+                    if value is not _MISSING:
+                        push(value)
+                        continue
+                self._step_count = steps
+                value = self._exec_program(self.compile(body), env, call_params)
+                steps = self._step_count
+                if key is not None:
+                    self._memo[key] = value
+                push(value)
+        self._step_count = steps
+        return stack[-1]
     
     def get_all_ops(self) -> List[str]:
         """Get all available operations (built-in + custom)."""
         return list(self.ALLOWED_OPS.keys()) + list(self._custom_primitives.keys())
 
 
+# Integer opcodes for the built-ins, in base-class ALLOWED_OPS order
+OP_CUSTOM = -1
+_OP_NAMES: Tuple[str, ...] = tuple(SafeInterpreter.ALLOWED_OPS)
+_OP_NAME_TO_ID: Dict[str, int] = {name: i for i, name in enumerate(_OP_NAMES)}
+
+
 class SemanticHasher:
     """
     Computes semantic hash of DSL expressions.
@@ -213,33 +560,16 @@ class SemanticHasher:
     
     @staticmethod
     def hash(expr: DSLExpr) -> str:
-        """Compute canonical hash of expression."""
-        return SemanticHasher._canonicalize(expr, {})
-    
-    @staticmethod
-    def _canonicalize(expr: DSLExpr, var_map: Dict[str, int]) -> str:
-        """Create canonical string representation."""
-        if isinstance(expr, DSLVal):
-            return f"V({expr.value})"
-        
-        elif isinstance(expr, DSLVar):
-            # Rename variables to canonical form
-            if expr.name not in var_map:
-                var_map[expr.name] = len(var_map)
-            return f"X{var_map[expr.name]}"
-        
-        elif isinstance(expr, DSLApp):
-            args_str = ",".join(
-                SemanticHasher._canonicalize(arg, var_map) 
-                for arg in expr.args
-            )
-            return f"{expr.func}({args_str})"
-        
-        return "?"
+        """Compute canonical hash of expression (cached on the node)."""
+        if expr._hash is None:
+            object.__setattr__(expr, '_hash', expr.canonicalize({}))
+        return expr._hash
     
     @staticmethod
     def are_equivalent(expr1: DSLExpr, expr2: DSLExpr) -> bool:
         """Check if two expressions are semantically equivalent."""
+        if expr1 is expr2:
+            return True
         return SemanticHasher.hash(expr1) == SemanticHasher.hash(expr2)
 
 
@@ -258,11 +588,7 @@ class UtilityScorer:
     @staticmethod
     def compute_size(expr: DSLExpr) -> int:
         """Compute AST node count."""
-        if isinstance(expr, (DSLVal, DSLVar)):
-            return 1
-        elif isinstance(expr, DSLApp):
-            return 1 + sum(UtilityScorer.compute_size(arg) for arg in expr.args)
-        return 1
+        return expr.size()
     
     @staticmethod
     def compression_ratio(original_size: int, primitive_size: int) -> float:
@@ -0,0 +1,96 @@
+"""Persistent, content-addressed cache of validator verdicts (opt-in).
+
+Set SYSTEMTEST_VALIDATOR_CACHE to a sqlite file path to share (ok, err)
+verdicts across runs and processes. Entries are keyed by a BLAKE2b digest of
+the validator kind and source, salted with a fingerprint of the validation
+rules so that editing them invalidates old verdicts.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+from pathlib import Path
+from typing import Optional, Tuple
+
+ENV_VAR = "SYSTEMTEST_VALIDATOR_CACHE"
+
+_RULE_FILES = (
+    Path(__file__).with_name("validators.py"),
+    Path(__file__).resolve().parents[1] / "Systemtest.py",  # algo_program_limits_ok, SAFE_BUILTINS
+)
+
+
+def _rules_fingerprint() -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    for path in _RULE_FILES:
+        try:
+            digest.update(path.read_bytes())
+        except OSError:
+            digest.update(b"<missing>")
+    return digest.digest()
+
+
+class ValidatorCache:
+    """sqlite-backed verdict store. Any sqlite error degrades to a cache miss."""
+
+    def __init__(self, path: str, fingerprint: bytes):
+        self.path = path
+        self._salt = fingerprint
+        self._conn = sqlite3.connect(path, timeout=1.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts (key BLOB PRIMARY KEY, ok INTEGER NOT NULL, err TEXT NOT NULL)"
+        )
+
+    def _key(self, kind: str, code: str) -> bytes:
+        digest = hashlib.blake2b(self._salt, digest_size=16)
+        digest.update(kind.encode())
+        digest.update(b"\0")
+        digest.update(code.encode("utf-8", "surrogatepass"))
+        return digest.digest()
+
+    def get(self, kind: str, code: str) -> Optional[Tuple[bool, str]]:
+        try:
+            row = self._conn.execute(
+                "SELECT ok, err FROM verdicts WHERE key = ?", (self._key(kind, code),)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return None if row is None else (bool(row[0]), row[1])
+
+    def put(self, kind: str, code: str, verdict: Tuple[bool, str]) -> None:
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verdicts (key, ok, err) VALUES (?, ?, ?)",
+                (self._key(kind, code), int(verdict[0]), verdict[1]),
+            )
+        except sqlite3.Error:
+            pass
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_CACHE: Optional[ValidatorCache] = None
+_CACHE_OWNER: Optional[Tuple[int, str]] = None  # (pid, path): connections must not cross a fork
+_FINGERPRINT: Optional[bytes] = None
+
+
+def get_cache() -> Optional[ValidatorCache]:
+    """Return the process's cache for $SYSTEMTEST_VALIDATOR_CACHE, or None when unset."""
+    global _CACHE, _CACHE_OWNER, _FINGERPRINT
+    path = os.environ.get(ENV_VAR)
+    if not path:
+        return None
+    owner = (os.getpid(), path)
+    if _CACHE_OWNER != owner:
+        if _FINGERPRINT is None:
+            _FINGERPRINT = _rules_fingerprint()
+        try:
+            _CACHE = ValidatorCache(path, _FINGERPRINT)
+        except sqlite3.Error:
+            _CACHE = None
+        _CACHE_OWNER = owner
+    return _CACHE
@@ -2,57 +2,172 @@
 from __future__ import annotations
 
 import dataclasses
+import functools
 import json
-import textwrap
-from typing import Any, Dict, List, Tuple
+import marshal
+import math
+import os
+import pickle
+import signal
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from watchdog_executor import WatchdogExecutor
 
 
-def _serialize_task(task: Any) -> str:
+_LITERAL_SCALARS = (int, str, bool, type(None))
+
+
+def _is_literal(value: Any) -> bool:
+    # Exact types only: subclasses (IntEnum, ...) may not repr() as literals
+    kind = type(value)
+    if kind in _LITERAL_SCALARS:
+        return True
+    if kind is float:
+        return math.isfinite(value)
+    if kind is list or kind is tuple:
+        return all(_is_literal(item) for item in value)
+    if kind is dict:
+        return all(type(key) in _LITERAL_SCALARS and _is_literal(item) for key, item in value.items())
+    return False
+
+
+def _fast_literal(value: Any) -> Optional[str]:
+    """repr() of `value` when it round-trips as a Python literal, else None."""
+    return repr(value) if _is_literal(value) else None
+
+
+def _task_payload(task: Any) -> Dict[str, Any]:
     if dataclasses.is_dataclass(task):
-        payload = dataclasses.asdict(task)
-    elif hasattr(task, "__dict__"):
-        payload = dict(task.__dict__)
-    else:
-        payload = {"value": task}
-    return json.dumps(payload, default=str)
+        return dataclasses.asdict(task)
+    if hasattr(task, "__dict__"):
+        return dict(task.__dict__)
+    return {"value": task}
 
 
-def _primitive_prelude() -> str:
-    return textwrap.dedent(
-        """
+def _task_input(task: Any) -> _TaskView:
+    """Task rebuilt for the child: primitive payloads as-is, others JSON-normalized as before."""
+    payload = _task_payload(task)
+    if not _is_literal(payload):
+        payload = json.loads(json.dumps(payload, default=str))
+    return _TaskView(payload)
+
+
+_RUNTIME_PRIMITIVES: Optional[Dict[str, Callable[..., Any]]] = None
+_RUNTIME_PRIMITIVES_STAMP: Optional[int] = None
+
+
+def _registry_stamp() -> Optional[int]:
+    from neuro_genetic_synthesizer import REGISTRY_FILE
+
+    try:
+        return os.stat(REGISTRY_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def runtime_primitives() -> Dict[str, Callable[..., Any]]:
+    """
+    LibraryManager runtime primitives, built once per process and rebuilt only
+    when the registry file changes. Watchdog children are forked, so they
+    inherit the parent's table instead of re-reading the registry.
+    """
+    global _RUNTIME_PRIMITIVES, _RUNTIME_PRIMITIVES_STAMP
+    stamp = _registry_stamp()
+    if _RUNTIME_PRIMITIVES is None or stamp != _RUNTIME_PRIMITIVES_STAMP:
         from neuro_genetic_synthesizer import LibraryManager
 
-        _lib = LibraryManager()
-        globals().update(_lib.runtime_primitives)
-        """
-    )
+        _RUNTIME_PRIMITIVES = LibraryManager().runtime_primitives
+        _RUNTIME_PRIMITIVES_STAMP = stamp
+    return _RUNTIME_PRIMITIVES
+
+
+# Wrapper templates are kept flush-left so no per-call dedent is needed
+_PRIMITIVE_PRELUDE = """\
+from systemtest.execution import runtime_primitives
+
+globals().update(runtime_primitives())
+"""
+
+_RUN_CAND_TEMPLATE = """\
+import json
+
+{code}
+if 'solve' in locals():
+    result = solve(task)
+else:
+    result = None
+"""
+
+_BATCH_TEMPLATE = """\
+from systemtest.execution import _run_batch
+
+result = _run_batch(_candidates, _payload, _timeout, globals())
+"""
+
+_EXPR_TEMPLATE = """\
+{unpack}
+{assignments}
+result = ({expr})
+"""
+
+
+def _primitive_prelude() -> str:
+    # Warm the cache in the parent so forked children start with it
+    runtime_primitives()
+    return _PRIMITIVE_PRELUDE
+
+
+_EXECUTOR: Optional[WatchdogExecutor] = None
+_WORKER_STAMP: Optional[int] = None
+
+
+def _run_watchdog(
+    wrapper: Union[str, bytes],
+    timeout: float,
+    inject_primitives: bool = True,
+    inputs: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Run `wrapper` in a long-lived watchdog worker shared by all callers.
+
+    The primitive prelude is the worker's setup, so it runs once per worker
+    rather than once per call; each call then runs in a fresh fork of the
+    worker, so nothing a candidate mutates (builtins, modules, globals)
+    reaches the next one. Workers are restarted when the registry changes.
+    """
+    global _EXECUTOR, _WORKER_STAMP
+    if _EXECUTOR is None:
+        _EXECUTOR = WatchdogExecutor(timeout=timeout)
+    setup = ""
+    if inject_primitives:
+        setup = _primitive_prelude()
+        if _RUNTIME_PRIMITIVES_STAMP != _WORKER_STAMP:
+            _EXECUTOR.stop_workers()
+            _WORKER_STAMP = _RUNTIME_PRIMITIVES_STAMP
+    return _EXECUTOR.run_with_setup(setup, wrapper, timeout=timeout, inputs=inputs)
+
+
+@functools.lru_cache(maxsize=1024)
+def prepare_candidate(code: str) -> Union[str, bytes]:
+    """
+    Wrap and compile a candidate once in the parent; the worker only
+    marshal.loads() and execs it against its prebuilt primitive namespace.
+    Source that fails to compile is returned as text so the worker reports
+    the SyntaxError as before.
+    """
+    source = _RUN_CAND_TEMPLATE.format(code=code)
+    try:
+        return marshal.dumps(compile(source, "<candidate>", "exec"))
+    except (SyntaxError, ValueError):
+        return source
 
 
 def run_candidate_with_watchdog(code: str, task: Any, timeout: float) -> Tuple[bool, str]:
-    payload = _serialize_task(task)
-    wrapper = textwrap.dedent(
-        f"""
-        import json
-
-        _payload = json.loads({payload!r})
-
-        class Task:
-            def __init__(self, payload: dict):
-                self.__dict__.update(payload)
-
-        task = Task(_payload)
-        {_primitive_prelude()}
-        {code}
-        if 'solve' in locals():
-            result = solve(task)
-        else:
-            result = None
-        """
-    )
-    executor = WatchdogExecutor(timeout=timeout)
-    result = executor.run_safe(wrapper, timeout=timeout)
+    result = _run_watchdog(prepare_candidate(code), timeout, inputs={"task": _task_input(task)})
+    if result.get("killed"):
+        return False, f"Watchdog timeout after {timeout}s"
     if not result.get("success"):
         return False, result.get("error", "Watchdog failure")
     if result.get("result") is None:
@@ -60,21 +175,112 @@ def run_candidate_with_watchdog(code: str, task: Any, timeout: float) -> Tuple[b
     return True, f"Result: {result.get('result')}, Expected: {getattr(task, 'expected', None)}"
 
 
+class _TaskView:
+    def __init__(self, payload: dict):
+        self.__dict__.update(payload)
+
+
+class _CandidateTimeout(BaseException):
+    pass
+
+
+def _on_candidate_alarm(signum, frame):
+    raise _CandidateTimeout()
+
+
+_ALARM_REPEAT = 0.05  # re-raise _CandidateTimeout this often until the candidate returns
+
+
+def _run_batch(
+    candidates: List[Union[str, bytes]],
+    payload: bytes,
+    timeout: float,
+    base_scope: Dict[str, Any],
+) -> List[Tuple[str, Any]]:
+    """
+    Child side of run_candidates_with_watchdog: exec each prepared candidate
+    (see prepare_candidate) in its own copy of `base_scope`, with its own
+    task unpickled from `payload`, under a per-candidate ITIMER_REAL alarm.
+    The alarm repeats until disarmed and the deadline is re-checked after
+    each candidate, so one that swallows the timeout with a bare except is
+    still reported as timed out. Returns exactly one (status, value) pair
+    per candidate.
+    """
+    results: List[Tuple[str, Any]] = []
+    previous = signal.signal(signal.SIGALRM, _on_candidate_alarm)
+    try:
+        for source in candidates:
+            scope = dict(base_scope)
+            scope["task"] = _TaskView(pickle.loads(payload))
+            code = marshal.loads(source) if isinstance(source, bytes) else source
+            started = time.monotonic()
+            try:
+                signal.setitimer(signal.ITIMER_REAL, timeout, _ALARM_REPEAT)
+                try:
+                    exec(code, scope)
+                finally:
+                    # Disarmed before anything else runs, so a late alarm can
+                    # only surface inside this try and never after the outcome
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+                outcome = ("ok", scope.get("result"))
+            except _CandidateTimeout:
+                outcome = ("timeout", None)
+            except Exception:
+                outcome = ("error", traceback.format_exc())
+            if time.monotonic() - started >= timeout:
+                outcome = ("timeout", None)
+            results.append(outcome)
+    finally:
+        signal.signal(signal.SIGALRM, previous)
+    return results
+
+
+def run_candidates_with_watchdog(codes: List[str], task: Any, timeout: float) -> List[Tuple[bool, str]]:
+    """
+    Batched run_candidate_with_watchdog: one worker call runs every candidate
+    in `codes` against `task`, through the same wrapper and task view as the
+    single-candidate path. Each candidate is limited to `timeout` and the
+    whole batch to len(codes) * timeout; if the batch itself is killed,
+    every candidate is reported as timed out.
+    """
+    if not codes:
+        return []
+    inputs = {
+        "_candidates": [prepare_candidate(code) for code in codes],
+        "_payload": pickle.dumps(vars(_task_input(task))),
+        "_timeout": timeout,
+    }
+    result = _run_watchdog(_BATCH_TEMPLATE, timeout * len(codes), inputs=inputs)
+    if result.get("killed"):
+        return [(False, f"Watchdog timeout after {timeout}s")] * len(codes)
+    if not result.get("success"):
+        return [(False, result.get("error", "Watchdog failure"))] * len(codes)
+    expected = getattr(task, "expected", None)
+    outcomes: List[Tuple[bool, str]] = []
+    for status, value in result["result"]:
+        if status == "timeout":
+            outcomes.append((False, f"Watchdog timeout after {timeout}s"))
+        elif status == "error":
+            outcomes.append((False, value))
+        elif value is None:
+            outcomes.append((False, "No 'solve' function defined"))
+        else:
+            outcomes.append((True, f"Result: {value}, Expected: {expected}"))
+    return outcomes
+
+
 def make_watchdog_callable(code: str, func_name: str, timeout: float = 2.0, inject_primitives: bool = True):
+    # Compiled once here; each call ships the marshaled bytecode and pickled
+    # args to the worker instead of a freshly formatted source blob
+    source = f"{code}\nresult = {func_name}(*_args, **_kwargs)\n"
+    try:
+        compiled: Any = marshal.dumps(compile(source, "<candidate>", "exec"))
+    except SyntaxError:
+        # Let the worker raise it so callers see the same error as before
+        compiled = source
+
     def _call(*args, **kwargs):
-        payload = json.dumps({"args": args, "kwargs": kwargs}, default=str)
-        prelude = _primitive_prelude() if inject_primitives else ""
-        wrapper = textwrap.dedent(
-            f"""
-            import json
-            _payload = json.loads({payload!r})
-            {prelude}
-            {code}
-            result = {func_name}(*_payload['args'], **_payload['kwargs'])
-            """
-        )
-        executor = WatchdogExecutor(timeout=timeout)
-        result = executor.run_safe(wrapper, timeout=timeout)
+        result = _run_watchdog(compiled, timeout, inject_primitives, inputs={"_args": args, "_kwargs": kwargs})
         if not result.get("success"):
             raise RuntimeError(result.get("error", "Watchdog execution failed"))
         return result.get("result")
@@ -88,25 +294,21 @@ def make_watchdog_expr_callable(
     timeout: float = 2.0,
     inject_primitives: bool = True,
 ):
+    # Per-callable constant; only the argument unpacking varies per call
+    assignments = "\n".join(
+        f"{name} = args[{idx}]" for idx, name in enumerate(params)
+    )
+
     def _call(*args, **kwargs):
-        payload = json.dumps({"args": args, "kwargs": kwargs}, default=str)
-        assignments = "\n".join(
-            f"{name} = args[{idx}]" for idx, name in enumerate(params)
-        )
-        prelude = _primitive_prelude() if inject_primitives else ""
-        wrapper = textwrap.dedent(
-            f"""
-            import json
-            _payload = json.loads({payload!r})
-            args = _payload['args']
-            kwargs = _payload['kwargs']
-            {prelude}
-            {assignments}
-            result = ({expr})
-            """
-        )
-        executor = WatchdogExecutor(timeout=timeout)
-        result = executor.run_safe(wrapper, timeout=timeout)
+        # Primitive args are embedded as a literal; anything else is pickled
+        # over the worker pipe rather than stringified through JSON
+        literal = _fast_literal((args, kwargs))
+        if literal is not None:
+            unpack, inputs = f"args, kwargs = {literal}", None
+        else:
+            unpack, inputs = "", {"args": args, "kwargs": kwargs}
+        wrapper = _EXPR_TEMPLATE.format(unpack=unpack, assignments=assignments, expr=expr)
+        result = _run_watchdog(wrapper, timeout, inject_primitives, inputs=inputs)
         if not result.get("success"):
             raise RuntimeError(result.get("error", "Watchdog execution failed"))
         return result.get("result")
@@ -2,10 +2,18 @@
 from __future__ import annotations
 
 import ast
+import functools
 from dataclasses import dataclass
-from typing import Iterable, Optional, Set, Tuple
+from typing import Callable, Iterable, Optional, Set, Tuple
 
-FORBIDDEN_NAMES = {"open", "eval", "exec", "compile", "__import__", "globals", "locals"}
+from systemtest._validator_cache import get_cache
+
+FORBIDDEN_NAMES = frozenset({"open", "eval", "exec", "compile", "__import__", "globals", "locals"})
+
+
+def _forbidden_name(name: str) -> bool:
+    # visit() inlines this predicate; kept for callers outside the walk
+    return name[:2] == "__" or name in FORBIDDEN_NAMES
 
 
 def _safe_builtins() -> Set[str]:
@@ -17,6 +25,37 @@ def _safe_builtins() -> Set[str]:
         return set()
 
 
+@functools.lru_cache(maxsize=None)
+def allowed_type_set(allowed_nodes: Tuple[type, ...]) -> frozenset:
+    """
+    Every concrete class matched by `allowed_nodes`, including subclasses of
+    abstract bases such as ast.operator, so per-node checks are a set lookup.
+    """
+    found = set()
+    pending = list(allowed_nodes)
+    while pending:
+        cls = pending.pop()
+        if cls not in found:
+            found.add(cls)
+            pending.extend(cls.__subclasses__())
+    return frozenset(found)
+
+
+# Node types that need a check beyond the allow-list; a node's tag in
+# node_tag_table() is 1 + its index here (0 = allowed, no extra check).
+_CHECKED_TYPES = (ast.Name, ast.Attribute, ast.Call, ast.Subscript)
+
+
+@functools.lru_cache(maxsize=None)
+def node_tag_table(allowed_nodes: Tuple[type, ...]) -> dict:
+    """Map every allowed node class to a small int tag; absent classes are forbidden."""
+    table = dict.fromkeys(allowed_type_set(allowed_nodes), 0)
+    for tag, cls in enumerate(_CHECKED_TYPES, 1):
+        if cls in table:
+            table[cls] = tag
+    return table
+
+
 @dataclass(frozen=True)
 class ValidationPolicy:
     allowed_nodes: Tuple[type, ...]
@@ -27,29 +66,56 @@ class BaseValidator(ast.NodeVisitor):
         self.policy = policy
         self.ok = True
         self.err: Optional[str] = None
+        self._tags = node_tag_table(policy.allowed_nodes)
+        self._builtin_names: Optional[Set[str]] = None
+        # Indexed by tag - 1, in _CHECKED_TYPES order
+        self._checks = (self._check_name, self._check_attribute, self._check_call, self._check_subscript)
+
+    def _check_name(self, node: ast.Name) -> Optional[str]:
+        if node.id[:2] == "__" or node.id in FORBIDDEN_NAMES:
+            return f"Forbidden name: {node.id}"
+        return None
+
+    def _check_attribute(self, node: ast.Attribute) -> Optional[str]:
+        if node.attr[:2] == "__":
+            return f"Forbidden attribute: {node.attr}"
+        return None
+
+    def _check_call(self, node: ast.Call) -> Optional[str]:
+        if not isinstance(node.func, (ast.Name, ast.Attribute)):
+            return "Forbidden call form (non-Name/Attribute callee)"
+        return None
+
+    def _check_subscript(self, node: ast.Subscript) -> Optional[str]:
+        if self._builtin_names is None:
+            self._builtin_names = _safe_builtins()
+        if isinstance(node.value, ast.Name) and node.value.id in self._builtin_names:
+            return "Forbidden subscript on builtin"
+        return None
 
     def visit(self, node):
-        if not isinstance(node, self.policy.allowed_nodes):
-            self.ok, self.err = False, f"Forbidden: {type(node).__name__}"
-            return
-        if isinstance(node, ast.Name):
-            if node.id.startswith("__") or node.id in FORBIDDEN_NAMES:
-                self.ok, self.err = False, f"Forbidden name: {node.id}"
-                return
-        if isinstance(node, ast.Attribute):
-            if node.attr.startswith("__"):
-                self.ok, self.err = False, f"Forbidden attribute: {node.attr}"
-                return
-        if isinstance(node, ast.Call):
-            if not isinstance(node.func, (ast.Name, ast.Attribute)):
-                self.ok, self.err = False, "Forbidden call form (non-Name/Attribute callee)"
-                return
-        if isinstance(node, ast.Subscript):
-            safe_builtins = _safe_builtins()
-            if isinstance(node.value, ast.Name) and node.value.id in safe_builtins:
-                self.ok, self.err = False, "Forbidden subscript on builtin"
-                return
-        super().generic_visit(node)
+        # Iterative pre-order walk (children in source order) that stops at
+        # the first violation instead of recursing through generic_visit
+        tags = self._tags
+        allowed_nodes = self.policy.allowed_nodes
+        checks = self._checks
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            tag = tags.get(type(node))
+            if tag is None:
+                # isinstance() is only the fallback for classes defined after the table was built
+                if not isinstance(node, allowed_nodes):
+                    self.ok, self.err = False, f"Forbidden: {type(node).__name__}"
+                    return
+            elif tag:
+                err = checks[tag - 1](node)
+                if err is not None:
+                    self.ok, self.err = False, err
+                    return
+            children = list(ast.iter_child_nodes(node))
+            children.reverse()
+            stack.extend(children)
 
 
 def _make_allowed(*nodes: Iterable[type]) -> Tuple[type, ...]:
@@ -196,29 +262,41 @@ class AlgoProgramValidator(BaseValidator):
         super().__init__(ValidationPolicy(ALGO_ALLOWED))
 
 
-def validate_code(code: str) -> Tuple[bool, str]:
-    try:
-        tree = ast.parse(code)
-        v = CodeValidator()
-        v.visit(tree)
-        return v.ok, v.err or ""
-    except Exception as exc:
-        return False, str(exc)
+# Synthesis loops validate the same candidate source many times, so both the
+# parse and the (ok, err) verdicts are memoized per distinct string.
+_CACHE_SIZE = 4096
 
 
-def validate_program(code: str) -> Tuple[bool, str]:
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def _parse(code: str) -> ast.Module:
+    """Parse once per distinct source. The tree is shared: callers must not mutate it."""
+    return ast.parse(code)
+
+
+def _verdict(kind: str, code: str, validate: Callable[[str], Tuple[bool, str]]) -> Tuple[bool, str]:
+    """Consult the persistent content-addressed cache (when enabled) before validating."""
+    store = get_cache()
+    if store is None:
+        return validate(code)
+    verdict = store.get(kind, code)
+    if verdict is None:
+        verdict = validate(code)
+        store.put(kind, code, verdict)
+    return verdict
+
+
+def _run_validator(validator: BaseValidator, code: str) -> Tuple[bool, str]:
     try:
-        tree = ast.parse(code)
-        v = ProgramValidator()
-        v.visit(tree)
-        return v.ok, v.err or ""
+        tree = _parse(code)
+        validator.visit(tree)
+        return validator.ok, validator.err or ""
     except Exception as exc:
         return False, str(exc)
 
 
-def validate_algo_program(code: str) -> Tuple[bool, str]:
+def _validate_algo_program(code: str) -> Tuple[bool, str]:
     try:
-        tree = ast.parse(code)
+        tree = _parse(code)
         v = AlgoProgramValidator()
         v.visit(tree)
         if not v.ok:
@@ -229,3 +307,18 @@ def validate_algo_program(code: str) -> Tuple[bool, str]:
         return True, ""
     except Exception as exc:
         return False, str(exc)
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def validate_code(code: str) -> Tuple[bool, str]:
+    return _verdict("code", code, lambda src: _run_validator(CodeValidator(), src))
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def validate_program(code: str) -> Tuple[bool, str]:
+    return _verdict("program", code, lambda src: _run_validator(ProgramValidator(), src))
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def validate_algo_program(code: str) -> Tuple[bool, str]:
+    return _verdict("algo_program", code, _validate_algo_program)
@@ -2,9 +2,17 @@ import os
 import sys
 import time
 
+import pytest
+
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from Systemtest import InventionEvaluator, InventionTask
+from Systemtest import (
+    InventionArchive,
+    InventionEvaluator,
+    InventionProgramCandidate,
+    InventionTask,
+    RewardModel,
+)
 
 
 def test_invention_evaluator_runs_with_watchdog():
@@ -25,3 +33,87 @@ def test_invention_evaluator_times_out_with_watchdog():
     assert not success
     assert "Watchdog timeout" in info
     assert elapsed < 2.0
+
+
+def test_batched_candidates_time_out_individually():
+    from systemtest.execution import run_candidates_with_watchdog
+
+    task = InventionTask(kind="unit", input=1, expected=2)
+    codes = [
+        "def solve(task):\n    while True:\n        pass\n",
+        "def solve(task):\n    return task.expected\n",
+        "x = 1\n",
+    ]
+    results = run_candidates_with_watchdog(codes, task, timeout=0.2)
+    assert [ok for ok, _ in results] == [False, True, False]
+    assert "Watchdog timeout" in results[0][1]
+
+
+
+def test_batched_candidates_get_their_own_task():
+    from systemtest.execution import run_candidates_with_watchdog
+
+    task = InventionTask(kind="unit", input=[1, 2], expected=3)
+    codes = [
+        "def solve(task):\n    task.input.append(100)\n    return sum(task.input)\n",
+        "def solve(task):\n    return sum(task.input)\n",
+    ]
+    results = run_candidates_with_watchdog(codes, task, timeout=1.0)
+    assert results == [(True, "Result: 103, Expected: 3"), (True, "Result: 3, Expected: 3")]
+
+
+def test_batched_candidate_cannot_swallow_its_timeout():
+    from systemtest.execution import run_candidates_with_watchdog
+
+    task = InventionTask(kind="unit", input=1, expected=2)
+    codes = [
+        "def solve(task):\n    try:\n        while True:\n            pass\n    except:\n        return task.expected\n",
+        "def solve(task):\n    return task.expected\n",
+    ]
+    results = run_candidates_with_watchdog(codes, task, timeout=0.2)
+    assert [ok for ok, _ in results] == [False, True]
+    assert "Watchdog timeout" in results[0][1]
+
+def test_batch_evaluation_matches_per_candidate_evaluation():
+    codes = [
+        "def solve(task):\n    return task.expected\n",
+        "def solve(task):\n    return task.input\n",
+        "def solve(task):\n    raise ValueError('no')\n",
+    ]
+    tasks = [InventionTask(kind="unit", input=n, expected=n + 1) for n in range(2)]
+    transfer = [InventionTask(kind="transfer", input=5, expected=5)]
+
+    def run(batched):
+        evaluator = InventionEvaluator()
+        candidates = [InventionProgramCandidate(f"c{i}", code, "test") for i, code in enumerate(codes)]
+        if batched:
+            evaluator.evaluate_batch(candidates, tasks, transfer, InventionArchive(), RewardModel())
+        else:
+            for candidate in candidates:
+                evaluator.evaluate(candidate, tasks, transfer, InventionArchive(), RewardModel())
+        return [
+            ([ok for ok, _ in c.diagnostics["results"]], [ok for ok, _ in c.diagnostics["transfer_results"]], c.score)
+            for c in candidates
+        ]
+
+    assert run(batched=True) == run(batched=False)
+
+
+def test_watchdog_callable_reports_unpicklable_arguments():
+    from systemtest.execution import make_watchdog_callable
+
+    apply = make_watchdog_callable("def apply(f, x):\n    return f(x)\n", "apply", timeout=1.0, inject_primitives=False)
+    assert apply(abs, -3) == 3
+    with pytest.raises(RuntimeError, match="Unpicklable inputs"):
+        apply(lambda x: x + 1, 3)
+    assert apply(abs, -4) == 4
+
+
+def test_watchdog_candidates_do_not_leak_process_state():
+    from systemtest.execution import run_candidate_with_watchdog
+
+    task = InventionTask(kind="unit", input=[1, 2], expected=3)
+    tamper = "import builtins\nbuiltins.sum = lambda *a: 103\ndef solve(task):\n    return sum(task.input)\n"
+    honest = "def solve(task):\n    return sum(task.input)\n"
+    assert run_candidate_with_watchdog(tamper, task, timeout=1.0) == (True, "Result: 103, Expected: 3")
+    assert run_candidate_with_watchdog(honest, task, timeout=1.0) == (True, "Result: 3, Expected: 3")
@@ -32,3 +32,22 @@ def test_primary_registry_loads(tmp_path, monkeypatch):
     lib = LibraryManager()
     assert lib.primitives == {}
     assert lib.registry_path == "rsi_primitive_registry.json"
+
+
+def test_synthesizer_registry_loads_values_orjson_rejects(tmp_path):
+    import math
+
+    from neuro_genetic_synthesizer import LibraryManager as SynthLibraryManager
+
+    registry_path = tmp_path / "rsi_primitive_registry.json"
+    registry_path.write_text(
+        json.dumps({
+            "concept_nan": {"code": "add(var_0, 1)", "level": 1, "usage": 2**70, "weight": float("nan"), "hash": "h"},
+        }),
+        encoding="utf-8",
+    )
+
+    lib = SynthLibraryManager(registry_path=str(registry_path), persist=False)
+    node = lib.primitives["concept_nan"]
+    assert math.isnan(node.weight)
+    assert node.usage_count == 2**70
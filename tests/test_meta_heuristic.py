@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from meta_heuristic import MetaHeuristic
+from neuro_genetic_synthesizer import NeuroGeneticSynthesizer
+
+
+def test_update_from_credits_redistributes_credited_weight():
+    meta = MetaHeuristic(no_io=True)
+    meta.weights.update({"sum_list": 1.0, "add": 1.0, "mul": 2.0})
+    meta.update_from_credits({"sum_list": 3, "add": 1, "neg": 0})
+    assert meta.weights["sum_list"] == pytest.approx(0.85 + 0.15 * 0.75 * 2.0)
+    assert meta.weights["add"] == pytest.approx(0.85 + 0.15 * 0.25 * 2.0)
+    assert meta.weights["mul"] == 2.0  # no credit: untouched
+    assert "neg" not in meta.weights
+
+
+def test_update_from_credits_retention():
+    meta = MetaHeuristic(no_io=True)
+    meta.weights.update({"a": 3.0, "b": 1.0})
+    meta.update_from_credits({"a": 1, "b": 1}, retention=1.0)
+    assert (meta.weights["a"], meta.weights["b"]) == (3.0, 1.0)
+    meta.update_from_credits({"a": 1, "b": 1}, retention=0.5)
+    # Equal credit pulls both halfway towards an even split of their mass (4.0)
+    assert meta.weights["a"] == pytest.approx(2.5)
+    assert meta.weights["b"] == pytest.approx(1.5)
+
+    before = dict(meta.weights)
+    meta.update_from_credits({})
+    meta.update_from_credits({"a": 0, "b": -1})
+    assert meta.weights == before
+
+
+def test_update_from_credits_does_not_write(tmp_path):
+    path = tmp_path / "weights.json"
+    meta = MetaHeuristic(load_path=str(path))
+    meta.update_from_credits({"add": 1})
+    assert not path.exists()
+    meta.save()
+    assert path.exists()
+
+
+def test_synthesizer_credits_ops_once_per_window():
+    synth = NeuroGeneticSynthesizer(use_meta_heuristic=True, persist=False)
+    meta = MetaHeuristic(no_io=True)
+    meta.weights.update({"sum_list": 1.0, "add": 1.0})
+    for code in ("sum_list(n)", "add(n, 1)")[: synth.CREDIT_WINDOW - 1]:
+        synth._credit_ops(code, meta)
+    assert (meta.weights["sum_list"], meta.weights["add"]) == (1.0, 1.0)
+
+    synth._credit_ops("sum_list(n)", meta)
+    assert synth._credit_window == []
+    # sum_list used twice, add once over the window of three
+    assert meta.weights["sum_list"] == pytest.approx(0.85 + 0.15 * (2 / 3) * 2.0)
+    assert meta.weights["add"] == pytest.approx(0.85 + 0.15 * (1 / 3) * 2.0)
+
+
+def test_synthesizer_reset_restores_native_primitive_state():
+    def snapshot(synth):
+        return {
+            name: (node.weight, node.usage_count)
+            for name, node in synth.library.primitives.items()
+        }
+
+    synth = NeuroGeneticSynthesizer(use_meta_heuristic=False, persist=False)
+    for _ in range(3):
+        synth.feedback(["add", "mul"], True)
+    synth.feedback(["sub"], False)
+    assert snapshot(synth)["add"] != snapshot(NeuroGeneticSynthesizer(persist=False))["add"]
+
+    synth.reset(seed=0)
+    assert snapshot(synth) == snapshot(NeuroGeneticSynthesizer(persist=False))
@@ -0,0 +1,126 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from safe_interpreter import (
+    DSLApp,
+    DSLVal,
+    DSLVar,
+    SafeInterpreter,
+    SemanticHasher,
+    UtilityScorer,
+    intern_expr,
+    mk_app,
+    mk_val,
+    mk_var,
+)
+
+
+def test_hash_consing_shares_identical_subtrees():
+    a = mk_app('add', [mk_var('n'), mk_val(1)])
+    b = mk_app('add', [mk_var('n'), mk_val(1)])
+    assert a is b and a._id is not None
+    assert mk_val(1) is not mk_val(True)
+
+    plain = DSLApp('mul', [DSLApp('add', [DSLVar('n'), DSLVal(1)]), DSLVal(2)])
+    interned = intern_expr(plain)
+    assert interned == plain
+    assert interned.args[0] is a
+    assert UtilityScorer.compute_size(interned) == 5
+    assert SemanticHasher.hash(interned) == SemanticHasher.hash(plain)
+
+
+def test_unhashable_literals_are_not_interned():
+    node = mk_app('len', [mk_val([1, 2, 3])])
+    assert node._id is None
+    assert SafeInterpreter().run(node, {}) == 3
+
+
+def test_custom_primitive_results_are_memoized_per_run():
+    interp = SafeInterpreter()
+    # double(x) = add(var_0, var_0); quad(x) = double(double(x))
+    interp.register_primitive('double', mk_app('add', [mk_var('var_0'), mk_var('var_0')]))
+    interp.register_primitive('shifted', mk_app('add', [mk_var('var_0'), mk_var('n')]))
+    expr = mk_app('add', [
+        mk_app('double', [mk_var('n')]),
+        mk_app('double', [mk_var('n')]),
+    ])
+    assert interp.run(expr, {'n': 3}) == 12
+    assert interp._step_count < 9  # second double(n) served from the memo
+    assert interp.run(expr, {'n': 4}) == 16
+
+    # Reads of the caller's env inside a primitive body are part of the key
+    call = mk_app('shifted', [mk_val(1)])
+    assert interp.run(call, {'n': 1}) == 2
+    assert interp.run(mk_app('add', [call, mk_app('id', [call])]), {'n': 5}) == 12
+
+    # The shared body div(var_0, 2) sees var_0 = 5 and 5.0: equal, but not interchangeable
+    interp.register_primitive('half', mk_app('div', [mk_var('var_0'), mk_val(2)]))
+    halves = mk_app('add', [mk_app('half', [mk_var('n')]), mk_app('half', [mk_var('m')])])
+    result = interp.run(halves, {'n': 5, 'm': 5.0})
+    assert result == 4 and type(result) is float
+
+
+def test_free_vars_cache_is_bounded(monkeypatch):
+    interp = SafeInterpreter()
+    monkeypatch.setattr(SafeInterpreter, 'FREE_VARS_CACHE_MAX', 8)
+    for i in range(50):
+        assert interp.run(mk_app('add', [mk_var('n'), mk_val(1000 + i)]), {'n': 1}) == 1001 + i
+    assert len(interp._free_vars_cache) <= 8
+
+
+def test_compiled_program_matches_tree_evaluation():
+    interp = SafeInterpreter()
+    interp.register_primitive('double', DSLApp('add', [DSLVar('var_0'), DSLVar('var_0')]))
+    expr = DSLApp('if_gt', [
+        DSLVar('n'),
+        DSLVal(3),
+        DSLApp('double', [DSLApp('sub', [DSLVar('n'), DSLVal(1)])]),
+        DSLApp('neg', [DSLVar('n')]),
+    ])
+    program = interp.compile(expr)
+    assert interp.compile(expr) is program
+    for n in range(-2, 8):
+        assert interp.run_program(program, {'n': n}) == interp.run(expr, {'n': n})
+
+
+def test_primitive_parameters_shadow_caller_bindings():
+    interp = SafeInterpreter()
+    interp.register_primitive('inner', DSLApp('add', [DSLVar('var_0'), DSLVar('var_1')]))
+    interp.register_primitive('outer', DSLApp('add', [
+        DSLApp('inner', [DSLVar('var_0')]),
+        DSLVar('var_1'),
+    ]))
+    expr = DSLApp('outer', [DSLVal(2), DSLVal(10)])
+    env = {'var_0': 100, 'var_1': 1000}
+    # inner(2) still sees outer's var_1 = 10: 2 + 10 + 10
+    assert interp.run(expr, env) == 22
+    assert interp.run_program(interp.compile(expr), env) == 22
+    assert interp.run(DSLApp('inner', [DSLVal(1)]), env) == 1001
+    assert env == {'var_0': 100, 'var_1': 1000}
+
+
+def test_allowed_ops_overrides_are_honoured():
+    import pytest
+
+    from safe_interpreter import SecurityError
+
+    class CheckedInterpreter(SafeInterpreter):
+        ALLOWED_OPS = {
+            **{k: v for k, v in SafeInterpreter.ALLOWED_OPS.items() if k != 'mul'},
+            'add': lambda a, b: a + b + 100,
+            'double': lambda a: a * 2,
+        }
+
+    expr = mk_app('add', [mk_app('double', [mk_var('n')]), mk_val(1)])
+    checked = CheckedInterpreter()
+    assert checked.run(expr, {'n': 3}) == 107
+    with pytest.raises(SecurityError):
+        checked.run(mk_app('mul', [mk_var('n'), mk_val(2)]), {'n': 3})
+    # The shared, cached program still runs with the base table elsewhere
+    assert SafeInterpreter().run(mk_app('add', [mk_var('n'), mk_val(1)]), {'n': 3}) == 4
+
+    checked.ALLOWED_OPS = {**CheckedInterpreter.ALLOWED_OPS, 'add': lambda a, b: a - b}
+    assert checked.run(mk_app('add', [mk_var('n'), mk_val(1)]), {'n': 3}) == 2
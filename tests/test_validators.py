@@ -59,3 +59,24 @@ def test_validate_algo_program_allows_loops():
     )
     ok, err = validate_algo_program(code)
     assert ok, err
+
+
+def test_validation_results_are_cached():
+    code = "def solve(x):\n    return x + 1\n"
+    validate_code.cache_clear()
+    assert validate_code(code) == validate_code(code) == (True, "")
+    assert validate_code.cache_info().hits == 1
+
+
+def test_verdicts_persist_in_content_addressed_cache(tmp_path, monkeypatch):
+    from systemtest import _validator_cache
+
+    monkeypatch.setenv(_validator_cache.ENV_VAR, str(tmp_path / "verdicts.sqlite"))
+    code = "import os\n"
+    validate_code.cache_clear()
+    assert validate_code(code)[0] is False
+
+    store = _validator_cache.get_cache()
+    assert store.get("code", code) == validate_code(code)
+    assert store.get("program", code) is None
+
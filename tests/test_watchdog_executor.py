@@ -0,0 +1,105 @@
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from watchdog_executor import WatchdogExecutor
+
+
+def test_run_with_setup_reuses_worker_and_isolates_calls():
+    executor = WatchdogExecutor(timeout=2.0)
+    setup = "import os\n_boot_pid = os.getpid()\n"
+    try:
+        first = executor.run_with_setup(setup, "leaked = 1\nresult = (_boot_pid, os.getppid())")
+        second = executor.run_with_setup(setup, "result = 'leaked' in globals()", inputs={"x": 3})
+        assert first["success"] and second["success"]
+        boot_pid, parent_pid = first["result"]
+        # Calls run in forks of the worker that ran setup
+        assert boot_pid == parent_pid
+        assert second["result"] is False
+
+        again = executor.run_with_setup(setup, "result = _boot_pid + x", inputs={"x": 1})
+        assert again["result"] == boot_pid + 1
+    finally:
+        executor.close()
+
+
+def test_run_with_setup_kills_and_restarts_on_timeout():
+    executor = WatchdogExecutor(timeout=0.5)
+    try:
+        hung = executor.run_with_setup("", "while True:\n    pass\n")
+        assert hung["killed"] is True
+        ok = executor.run_with_setup("", "result = 2 + 2")
+        assert ok["success"] and ok["result"] == 4
+    finally:
+        executor.close()
+
+
+def test_run_with_setup_accepts_marshaled_code():
+    import marshal
+
+    executor = WatchdogExecutor(timeout=2.0)
+    try:
+        code = marshal.dumps(compile("result = x * 2", "<candidate>", "exec"))
+        out = executor.run_with_setup("", code, inputs={"x": 21})
+        assert out["success"] and out["result"] == 42
+    finally:
+        executor.close()
+
+
+def test_run_with_setup_output_does_not_carry_over():
+    executor = WatchdogExecutor(timeout=2.0)
+    try:
+        first = executor.run_with_setup("", "print('first')\nresult = 1")
+        second = executor.run_with_setup("", "print('2')\nresult = 2")
+        assert first["output"] == "first\n"
+        assert second["output"] == "2\n"
+    finally:
+        executor.close()
+
+
+def test_run_with_setup_reports_unpicklable_inputs():
+    executor = WatchdogExecutor(timeout=2.0)
+    try:
+        out = executor.run_with_setup("", "result = 1", inputs={"f": lambda: 1})
+        assert out["success"] is False and out["killed"] is False
+        assert "Unpicklable inputs" in out["error"]
+        ok = executor.run_with_setup("", "result = 2")
+        assert ok["success"] and ok["result"] == 2
+    finally:
+        executor.close()
+
+
+def test_run_with_setup_isolates_process_state_between_calls():
+    executor = WatchdogExecutor(timeout=2.0)
+    setup = "import os\n"
+    try:
+        broken = executor.run_with_setup(
+            setup,
+            "import builtins, sys\n"
+            "builtins.sum = lambda *a: 103\n"
+            "sys.modules['os'].sep = '!'\n"
+            "os.chdir('/')\n"
+            "result = sum([1, 2])",
+        )
+        assert broken["success"] and broken["result"] == 103
+        clean = executor.run_with_setup(setup, "result = (sum([1, 2, 3]), os.sep, os.getcwd())")
+        assert clean["success"]
+        assert clean["result"] == (6, "/", os.getcwd())
+    finally:
+        executor.close()
+
+
+def test_run_with_setup_timeout_keeps_warm_worker():
+    executor = WatchdogExecutor(timeout=0.5)
+    setup = "import os\n_boot_pid = os.getpid()\n"
+    try:
+        before = executor.run_with_setup(setup, "result = _boot_pid")
+        hung = executor.run_with_setup(setup, "while True:\n    pass\n")
+        after = executor.run_with_setup(setup, "result = _boot_pid")
+        assert hung["killed"] is True
+        assert before["result"] == after["result"]
+    finally:
+        executor.close()
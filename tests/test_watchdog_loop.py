@@ -5,10 +5,15 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT))
 
+import rsi_watchdog_loop
 from rsi_watchdog_loop import (
     MAX_ROUNDS,
     TRIALS_PER_ROUND,
+    build_tasks,
+    evaluate_code_with_watchdog,
     normalize_caps,
+    peephole_program,
+    run_one_trial,
     run_watchdog_snippet,
     snapshot_artifacts,
 )
@@ -20,6 +25,15 @@ def test_loop_respects_caps():
     assert trials == TRIALS_PER_ROUND
 
 
+def test_build_tasks_shares_io_tables():
+    tasks = build_tasks(seed=0, trials=6)
+    by_type = {}
+    for task in tasks:
+        first = by_type.setdefault(task["type"], task["io_pairs"])
+        assert task["io_pairs"] is first
+    assert [pair["output"] for pair in by_type["square"]] == [0, 1, 4, 9, 16]
+
+
 def test_watchdog_timeout_enforced():
     code = """
 while True:
@@ -29,6 +43,41 @@ while True:
     assert result.get("killed") is True
 
 
+def test_evaluate_code_with_watchdog_checks_io_pairs():
+    io_pairs = [{"input": n, "output": n * 2} for n in range(3)]
+    ok, elapsed = evaluate_code_with_watchdog("mul(n, 2)", io_pairs, timeout=2.0)
+    assert ok and elapsed is not None
+    ok, _ = evaluate_code_with_watchdog("add(n, 2)", io_pairs, timeout=2.0)
+    assert not ok
+
+
+def test_evaluate_code_with_watchdog_caches_results(monkeypatch):
+    io_pairs = [{"input": n, "output": n + 3} for n in range(3)]
+    assert evaluate_code_with_watchdog("add(n, 3)", io_pairs, timeout=2.0)[0]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("sandbox should not run for a cached candidate")
+
+    monkeypatch.setattr(rsi_watchdog_loop, "run_watchdog_snippet", fail)
+    assert evaluate_code_with_watchdog("add(n, 3)", io_pairs, timeout=2.0)[0]
+
+
+def test_evaluate_code_with_watchdog_cache_follows_registry(monkeypatch):
+    io_pairs = [{"input": n, "output": n + 4} for n in range(3)]
+    assert evaluate_code_with_watchdog("add(n, 4)", io_pairs, timeout=2.0)[0]
+
+    calls = []
+
+    def rejected(*args, **kwargs):
+        calls.append(args)
+        return {"success": False}
+
+    monkeypatch.setattr(rsi_watchdog_loop, "run_watchdog_snippet", rejected)
+    monkeypatch.setattr(rsi_watchdog_loop, "_registry_stamp", lambda: -1)
+    assert not evaluate_code_with_watchdog("add(n, 4)", io_pairs, timeout=2.0)[0]
+    assert len(calls) == 1
+
+
 def test_persistence_roundtrip(tmp_path, monkeypatch):
     meta = tmp_path / "rsi_meta_weights.json"
     registry = tmp_path / "rsi_primitive_registry.json"
@@ -41,3 +90,63 @@ def test_persistence_roundtrip(tmp_path, monkeypatch):
 
     assert (output_dir / "rsi_meta_weights.json").exists()
     assert (output_dir / "rsi_primitive_registry.json").exists()
+
+
+def test_snapshot_hardlinks_unchanged_artifacts(tmp_path, monkeypatch):
+    (tmp_path / "rsi_meta_weights.json").write_text(json.dumps({"a": 1}), encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    snapshot_artifacts(tmp_path / "round_0_after")
+    snapshot_artifacts(tmp_path / "round_1_before")
+    first = tmp_path / "round_0_after" / "rsi_meta_weights.json"
+    second = tmp_path / "round_1_before" / "rsi_meta_weights.json"
+    assert first.stat().st_ino == second.stat().st_ino
+
+    (tmp_path / "rsi_meta_weights.json").write_text(json.dumps({"a": 2}), encoding="utf-8")
+    snapshot_artifacts(tmp_path / "round_1_after")
+    third = tmp_path / "round_1_after" / "rsi_meta_weights.json"
+    assert third.stat().st_ino != second.stat().st_ino
+    assert json.loads(third.read_text(encoding="utf-8")) == {"a": 2}
+
+
+def test_peephole_solves_trivial_tasks_without_synthesis():
+    assert peephole_program([{"input": 3, "output": 3}, {"input": 4, "output": 4}]) == "n"
+    assert peephole_program([{"input": [1, 2], "output": 3}]) == "sum_list(n)"
+    assert peephole_program([{"input": 2, "output": 4}]) is None
+
+    class _NoSynth:
+        def synthesize(self, *args, **kwargs):
+            raise AssertionError("peephole should bypass synthesis")
+
+    identity = {"io_pairs": [{"input": n, "output": n} for n in range(5)]}
+    result = run_one_trial(_NoSynth(), identity, 1.0, 1.0, peephole=True)
+    assert result.success and result.code == "n"
+
+
+def test_parallel_trial_is_seeded_and_does_not_persist():
+    artifacts = [ROOT / rsi_watchdog_loop.META_WEIGHTS_FILE, ROOT / rsi_watchdog_loop.REGISTRY_FILE]
+    before = [path.read_bytes() for path in artifacts]
+    task = build_tasks(seed=0, trials=3)[0]
+    first = rsi_watchdog_loop._run_one_trial(task, True, 1.0, 2.0, seed=11)
+    second = rsi_watchdog_loop._run_one_trial(task, True, 1.0, 2.0, seed=11)
+    assert first.code == second.code
+    assert [path.read_bytes() for path in artifacts] == before
+
+
+def test_parallel_workers_keep_treatment_serial(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_parallel(tasks, *args, **kwargs):
+        calls.append("parallel")
+        return [rsi_watchdog_loop.TrialResult(success=False, elapsed_s=0.0, code=None)] * len(tasks)
+
+    def fake_trials(tasks, synth_factory, use_meta, *args, **kwargs):
+        calls.append(("serial", use_meta))
+        synth = synth_factory(use_meta)
+        assert synth.use_meta_heuristic is use_meta
+        return [rsi_watchdog_loop.TrialResult(success=True, elapsed_s=0.0, code="n")] * len(tasks)
+
+    monkeypatch.setattr(rsi_watchdog_loop, "run_control_parallel", fake_parallel)
+    monkeypatch.setattr(rsi_watchdog_loop, "run_trials", fake_trials)
+    monkeypatch.setattr(rsi_watchdog_loop, "snapshot_artifacts", lambda output_dir: None)
+    rsi_watchdog_loop.run_loop(2, 2, 0, 1.0, 1.0, tmp_path, workers=4)
+    assert calls == ["parallel", ("serial", True)] * 2
@@ -77,15 +77,19 @@ def analyze_rsi_impact(registry_path="rsi_primitive_registry.json"):
     print(f"2. Max Innovation Depth: {max_depth} layers (e.g. A uses B which uses C...)")
     print(f"3. Bloat Detection: {bloat_count} concepts seem potentially redundant ({bloat_count/len(registry)*100:.1f}%)")
     
+    # Each table is formatted with one bound template and written in a single print
+    usage_row = "{}: Used by {} higher-level concepts. Code: {}".format
+    depth_row = "{} (Depth {}): {}".format
+
     print("\n=== TOP 5 MOST REUSED PRIMITIVES ===")
     sorted_usage = sorted(reuse_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-    for name, count in sorted_usage:
-        print(f"{name}: Used by {count} higher-level concepts. Code: {registry[name]['code']}")
+    if sorted_usage:
+        print("\n".join(usage_row(name, count, registry[name]['code']) for name, count in sorted_usage))
 
     print("\n=== LATEST INNOVATIONS (Highest Depth) ===")
     sorted_depth = sorted(depths.items(), key=lambda x: x[1], reverse=True)[:5]
-    for name, depth in sorted_depth:
-        print(f"{name} (Depth {depth}): {registry[name]['code']}")
+    if sorted_depth:
+        print("\n".join(depth_row(name, depth, registry[name]['code']) for name, depth in sorted_depth))
 
 if __name__ == "__main__":
     analyze_rsi_impact()
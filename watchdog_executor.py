@@ -9,11 +9,15 @@ Key Features:
 - Captures stdout and return values safely
 """
 
+import marshal
 import multiprocessing
+import os
+import pickle
+import signal
 import sys
 import io
 import traceback
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple, Union
 
 
 class WatchdogExecutor:
@@ -29,6 +33,7 @@ class WatchdogExecutor:
     """
     
     DEFAULT_TIMEOUT = 2.0
+    WORKER_GRACE = 1.0  # extra wait before giving up on a setup worker that enforces its own timeout
     
     def __init__(self, timeout: float = DEFAULT_TIMEOUT):
         """
@@ -38,9 +43,34 @@ class WatchdogExecutor:
             timeout: Maximum seconds to wait before killing the process
         """
         self.timeout = timeout
+        self._manager = None
+        self._workers: Dict[str, Any] = {}  # setup snippet -> (process, connection)
+    
+    def _shared_dict(self):
+        """
+        Return a fresh result dict from a Manager kept alive across calls.
+        
+        Starting a Manager spawns a server process, so one is reused for the
+        executor's lifetime instead of paying that startup on every run_safe().
+        """
+        if self._manager is not None:
+            try:
+                return self._manager.dict()
+            except (EOFError, OSError):
+                # Server went away (e.g. killed externally) - start a new one
+                self._manager = None
+        self._manager = multiprocessing.Manager()
+        return self._manager.dict()
+    
+    def close(self) -> None:
+        """Shut down the shared Manager process and any setup workers."""
+        self.stop_workers()
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
     
     @staticmethod
-    def _target_runner(code: str, return_dict: dict) -> None:
+    def _target_runner(code: Union[str, bytes], return_dict: dict, inputs: Optional[Dict[str, Any]] = None) -> None:
         """
         Internal function that runs inside the child process.
         
@@ -50,10 +80,39 @@ class WatchdogExecutor:
         Args:
             code: Python code string to execute
             return_dict: Shared dict for returning results to parent
+            inputs: Optional names bound in the global scope before exec
+        """
+        global_scope = {
+            '__builtins__': __builtins__,
+            '__name__': '__watchdog_child__',
+        }
+        WatchdogExecutor._execute(code, global_scope, return_dict, inputs)
+    
+    @staticmethod
+    def _execute(
+        code: Union[str, bytes],
+        global_scope: dict,
+        return_dict: dict,
+        inputs: Optional[Dict[str, Any]] = None,
+        streams: Optional[Tuple[io.StringIO, io.StringIO]] = None,
+    ) -> None:
+        """
+        Exec `code` in `global_scope` (child side) and record the outcome in `return_dict`.
+        
+        `code` is either source text or a marshal-dumped code object compiled
+        by the parent, which spares the child a parse + compile per call.
+        `streams` lets a long-lived worker reuse one (stdout, stderr) buffer
+        pair across calls; they are emptied here before use.
         """
         # Capture stdout to see what the code prints
-        captured_stdout = io.StringIO()
-        captured_stderr = io.StringIO()
+        if streams is None:
+            captured_stdout = io.StringIO()
+            captured_stderr = io.StringIO()
+        else:
+            captured_stdout, captured_stderr = streams
+            for stream in streams:
+                stream.seek(0)
+                stream.truncate()
         original_stdout = sys.stdout
         original_stderr = sys.stderr
         
@@ -63,22 +122,24 @@ class WatchdogExecutor:
             
             # Create execution scope
             local_scope = {}
-            global_scope = {
-                '__builtins__': __builtins__,
-                '__name__': '__watchdog_child__',
-            }
+            if inputs:
+                global_scope.update(inputs)
+            
+            if isinstance(code, bytes):
+                code = marshal.loads(code)
             
             # UNRESTRICTED EXECUTION - process isolation provides safety
             exec(code, global_scope, local_scope)
             
-            # Check for common entry points
+            # Check for common entry points (an explicit result wins, so
+            # wrappers can define solve(x) and call it themselves)
             result = None
-            if 'solve' in local_scope:
+            if 'result' in local_scope:
+                result = local_scope['result']
+            elif 'solve' in local_scope:
                 result = local_scope['solve']()
             elif 'main' in local_scope:
                 result = local_scope['main']()
-            elif 'result' in local_scope:
-                result = local_scope['result']
             
             return_dict['success'] = True
             return_dict['result'] = result
@@ -99,13 +160,125 @@ class WatchdogExecutor:
             sys.stdout = original_stdout
             sys.stderr = original_stderr
     
-    def run_safe(self, code: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+    @staticmethod
+    def _setup_worker(setup: str, conn) -> None:
+        """
+        Long-lived child: run `setup` once, then serve (code, inputs, timeout) requests.
+        
+        The worker acts as a fork server: each request runs in a freshly
+        forked copy of the post-setup process, so expensive setup (e.g.
+        loading the primitive library) is paid once per worker while
+        anything a call mutates - globals, builtins, imported modules, cwd -
+        dies with its fork. The worker enforces the timeout itself and
+        kills the fork, so a hung call no longer costs the warm worker.
+        Without os.fork (Windows) the worker serves one request and exits.
+        """
+        base_scope = {
+            '__builtins__': __builtins__,
+            '__name__': '__watchdog_child__',
+        }
+        streams = (io.StringIO(), io.StringIO())
+        setup_error = None
+        try:
+            exec(setup, base_scope)
+        except Exception:
+            setup_error = traceback.format_exc()
+        
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                return
+            if request is None:
+                return
+            code, inputs, timeout = request
+            if setup_error is not None:
+                conn.send({
+                    'success': False,
+                    'error': f'Setup failed:\n{setup_error}',
+                    'output': '',
+                    'result': None,
+                    'stderr': '',
+                })
+            elif not hasattr(os, 'fork'):
+                WatchdogExecutor._serve_request(code, base_scope, inputs, conn, streams)
+                return
+            else:
+                WatchdogExecutor._fork_request(code, base_scope, inputs, timeout, conn, streams)
+    
+    @staticmethod
+    def _serve_request(code: Union[str, bytes], base_scope: dict, inputs, conn, streams=None) -> None:
+        """Run one request in `base_scope` and send the outcome over `conn`."""
+        return_dict = {'success': False, 'output': '', 'result': None, 'stderr': ''}
+        WatchdogExecutor._execute(code, base_scope, return_dict, inputs, streams)
+        try:
+            conn.send(return_dict)
+        except Exception:
+            conn.send({
+                'success': False,
+                'error': f'Unpicklable result: {traceback.format_exc()}',
+                'output': return_dict.get('output', ''),
+                'result': None,
+                'stderr': return_dict.get('stderr', ''),
+            })
+    
+    @staticmethod
+    def _fork_request(code: Union[str, bytes], base_scope: dict, inputs, timeout: float, conn, streams=None) -> None:
+        """Serve one request in a forked child, killing it after `timeout` seconds."""
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        pid = os.fork()
+        if pid == 0:
+            # Child: never return into the worker loop
+            try:
+                reader.close()
+                WatchdogExecutor._serve_request(code, base_scope, inputs, writer, streams)
+            finally:
+                os._exit(0)
+        writer.close()
+        try:
+            if reader.poll(timeout):
+                # Forward the pickled result as-is; the parent unpickles it
+                conn.send_bytes(reader.recv_bytes())
+                return
+            result = {
+                'success': False,
+                'error': '🐨 Koala Watchdog: Process killed due to timeout (Infinite Loop detected)',
+                'output': '(Process terminated)',
+                'stderr': '(Process terminated)',
+                'result': None,
+                'killed': True,
+            }
+        except (EOFError, OSError):
+            result = {
+                'success': False,
+                'error': 'Unknown fatal error (process may have crashed)',
+                'output': '',
+                'stderr': '',
+                'result': None,
+            }
+        finally:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            os.waitpid(pid, 0)
+            reader.close()
+        conn.send(result)
+    
+    def run_safe(
+        self,
+        code: Union[str, bytes],
+        timeout: Optional[float] = None,
+        inputs: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
         """
         Execute code in an isolated subprocess with timeout protection.
         
         Args:
-            code: Python code string to execute
+            code: Python code string (or marshaled code object) to execute
             timeout: Override default timeout (seconds)
+            inputs: Optional names bound in the child's global scope, so
+                callers can reuse one snippet instead of interpolating values
             
         Returns:
             Dict with keys:
@@ -117,49 +290,155 @@ class WatchdogExecutor:
         """
         timeout = timeout or self.timeout
         
-        # Create shared state with Manager
-        with multiprocessing.Manager() as manager:
-            return_dict = manager.dict()
-            return_dict['success'] = False
-            return_dict['error'] = 'Unknown fatal error (process may have crashed)'
-            return_dict['output'] = ''
-            return_dict['result'] = None
-            return_dict['stderr'] = ''
+        # Create shared state with the executor's Manager
+        return_dict = self._shared_dict()
+        return_dict.update({
+            'success': False,
+            'error': 'Unknown fatal error (process may have crashed)',
+            'output': '',
+            'result': None,
+            'stderr': '',
+        })
+        
+        # Spawn isolated process
+        process = multiprocessing.Process(
+            target=self._target_runner,
+            args=(code, return_dict, inputs)
+        )
+        process.start()
+        
+        # Wait for completion with timeout
+        process.join(timeout)
+        
+        # Check if process is still running (infinite loop or hang)
+        if process.is_alive():
+            # KILL IT - no mercy for infinite loops
+            process.terminate()
+            process.join(0.5)  # Give it a moment to terminate gracefully
+            
+            if process.is_alive():
+                # Still alive? Force kill.
+                process.kill()
+                process.join()
             
-            # Spawn isolated process
+            return {
+                'success': False,
+                'error': '🐨 Koala Watchdog: Process killed due to timeout (Infinite Loop detected)',
+                'output': '(Process terminated)',
+                'stderr': '(Process terminated)',
+                'result': None,
+                'killed': True,
+            }
+        
+        # Process completed - return captured state
+        result = dict(return_dict)
+        result['killed'] = False
+        return result
+    
+    def run_with_setup(
+        self,
+        setup: str,
+        code: Union[str, bytes],
+        timeout: Optional[float] = None,
+        inputs: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Execute code in a persistent worker that has already run `setup`.
+        
+        The worker for a given setup snippet is started on first use and
+        reused until it dies, stops answering, or stop_workers() is called;
+        each call runs in its own fork of it (see _setup_worker), so calls
+        cannot see each other's side effects. `inputs` travel pickled over a
+        pipe rather than as code text, and `code` may be marshal.dumps() of
+        an already compiled code object.
+        Returns the same dict shape as run_safe().
+        """
+        timeout = timeout or self.timeout
+        
+        worker = self._workers.get(setup)
+        if worker is None or not worker[0].is_alive():
+            parent_conn, child_conn = multiprocessing.Pipe()
             process = multiprocessing.Process(
-                target=self._target_runner,
-                args=(code, return_dict)
+                target=self._setup_worker,
+                args=(setup, child_conn),
+                daemon=True,
             )
             process.start()
-            
-            # Wait for completion with timeout
-            process.join(timeout)
-            
-            # Check if process is still running (infinite loop or hang)
-            if process.is_alive():
-                # KILL IT - no mercy for infinite loops
-                process.terminate()
-                process.join(0.5)  # Give it a moment to terminate gracefully
-                
-                if process.is_alive():
-                    # Still alive? Force kill.
-                    process.kill()
-                    process.join()
-                
-                return {
-                    'success': False,
-                    'error': '🐨 Koala Watchdog: Process killed due to timeout (Infinite Loop detected)',
-                    'output': '(Process terminated)',
-                    'stderr': '(Process terminated)',
-                    'result': None,
-                    'killed': True,
-                }
-            
-            # Process completed - return captured state
-            result = dict(return_dict)
-            result['killed'] = False
-            return result
+            child_conn.close()
+            worker = self._workers[setup] = (process, parent_conn)
+        process, conn = worker
+        
+        try:
+            conn.send((code, inputs, timeout))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # Pickling fails before anything is written, so the worker is intact
+            return {
+                'success': False,
+                'error': f'Unpicklable inputs: {traceback.format_exc()}',
+                'output': '',
+                'stderr': '',
+                'result': None,
+                'killed': False,
+            }
+        except (EOFError, OSError):
+            self._stop_worker(setup)
+            return {
+                'success': False,
+                'error': 'Unknown fatal error (process may have crashed)',
+                'output': '',
+                'stderr': '',
+                'result': None,
+                'killed': False,
+            }
+        
+        try:
+            if conn.poll(timeout + self.WORKER_GRACE):
+                result = conn.recv()
+                result.setdefault('killed', False)
+                return result
+        except (EOFError, OSError):
+            # Worker crashed mid-call - report like a crashed run_safe child
+            self._stop_worker(setup)
+            return {
+                'success': False,
+                'error': 'Unknown fatal error (process may have crashed)',
+                'output': '',
+                'stderr': '',
+                'result': None,
+                'killed': False,
+            }
+        
+        # The worker itself stopped answering, so it is discarded (setup reruns next call)
+        self._stop_worker(setup)
+        return {
+            'success': False,
+            'error': '🐨 Koala Watchdog: Process killed due to timeout (Infinite Loop detected)',
+            'output': '(Process terminated)',
+            'stderr': '(Process terminated)',
+            'result': None,
+            'killed': True,
+        }
+    
+    def _stop_worker(self, setup: str) -> None:
+        worker = self._workers.pop(setup, None)
+        if worker is None:
+            return
+        process, conn = worker
+        if process.is_alive():
+            try:
+                conn.send(None)
+            except (EOFError, OSError):
+                pass
+            process.join(0.1)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        conn.close()
+    
+    def stop_workers(self) -> None:
+        """Stop all persistent setup workers (e.g. after the setup's inputs changed on disk)."""
+        for setup in list(self._workers):
+            self._stop_worker(setup)
     
     def validate_code(self, code: str, test_inputs: list = None) -> Dict[str, Any]:
         """